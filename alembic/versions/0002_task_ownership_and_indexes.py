@@ -0,0 +1,129 @@
+"""task ownership, timestamps and query-matched indexes
+
+Adds owner_id, the task timestamps and reminded_at, drops the indexes nothing
+queries (the primary keys' duplicates and the free-text title/description
+ones) and builds the indexes the CRUD, analytics and reminder queries use.
+On Postgres, indexes are built and dropped CONCURRENTLY so the table stays
+writable during the migration.
+
+Existing tasks have no recorded owner. If there are any, name the account
+that should own them explicitly:
+
+    alembic -x legacy_owner=<user id> upgrade head
+
+Without it the migration stops before changing anything; no task is deleted.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNUSED_INDEXES = [
+    ("ix_tasks_id", "tasks", ["id"]),
+    ("ix_tasks_title", "tasks", ["title"]),
+    ("ix_tasks_description", "tasks", ["description"]),
+    ("ix_users_id", "users", ["id"]),
+]
+
+TASK_INDEXES = [
+    ("ix_tasks_owner_id_id", ["owner_id", "id"], {}),
+    ("ix_tasks_owner_completed_id", ["owner_id", "completed", "id"], {}),
+    ("ix_tasks_owner_title", ["owner_id", "title"], {}),
+    ("ix_tasks_owner_completed_title", ["owner_id", "completed", "title"], {}),
+    ("ix_tasks_owner_title_pattern", ["owner_id", "title"], {"postgresql_ops": {"title": "text_pattern_ops"}}),
+    ("ix_tasks_owner_created_at", ["owner_id", "created_at"], {}),
+    ("ix_tasks_owner_completed_at", ["owner_id", "completed_at"], {}),
+    ("ix_tasks_owner_due_at", ["owner_id", "due_at"], {}),
+    (
+        "ix_tasks_due_at_pending",
+        ["due_at"],
+        {"postgresql_where": sa.text("NOT completed"), "sqlite_where": sa.text("NOT completed")},
+    ),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _outside_transaction():
+    # CONCURRENTLY cannot run inside a transaction block
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def _legacy_owner() -> Optional[int]:
+    """The owner for existing tasks; checked before any change, so a refusal leaves the schema untouched"""
+    legacy_owner = context.get_x_argument(as_dictionary=True).get("legacy_owner")
+    legacy_owner = int(legacy_owner) if legacy_owner else None
+    if context.is_offline_mode():
+        # Rows can't be inspected here; without an owner, SET NOT NULL fails on any existing task
+        return legacy_owner
+
+    bind = op.get_bind()
+    existing = bind.execute(sa.text("SELECT COUNT(*) FROM tasks")).scalar()
+    if not existing:
+        return None
+    if legacy_owner is None:
+        raise RuntimeError(
+            f"{existing} existing tasks have no owner. Choose the user who should own them and "
+            "rerun with: alembic -x legacy_owner=<user id> upgrade head"
+        )
+    if not bind.execute(sa.text("SELECT 1 FROM users WHERE id = :id"), {"id": legacy_owner}).scalar():
+        raise RuntimeError(f"legacy_owner={legacy_owner} is not an existing user id")
+    return legacy_owner
+
+
+def upgrade() -> None:
+    # Nothing recorded who created existing tasks, so the operator decides
+    legacy_owner = _legacy_owner()
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.add_column(sa.Column("owner_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False))
+        batch_op.add_column(sa.Column("completed_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("due_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("reminded_at", sa.DateTime(), nullable=True))
+
+    if legacy_owner is not None:
+        op.execute(sa.text(f"UPDATE tasks SET owner_id = {legacy_owner} WHERE owner_id IS NULL"))
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.alter_column("owner_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_tasks_owner_id_users", "users", ["owner_id"], ["id"], ondelete="CASCADE")
+
+    concurrently = _is_postgres()
+    with _outside_transaction():
+        for name, table, _ in UNUSED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=concurrently, if_exists=True)
+        for name, columns, kwargs in TASK_INDEXES:
+            op.create_index(name, "tasks", columns, postgresql_concurrently=concurrently, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    concurrently = _is_postgres()
+    with _outside_transaction():
+        for name, _, _ in TASK_INDEXES:
+            op.drop_index(name, table_name="tasks", postgresql_concurrently=concurrently, if_exists=True)
+        for name, table, columns in UNUSED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=concurrently, if_not_exists=True)
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_constraint("fk_tasks_owner_id_users", type_="foreignkey")
+        batch_op.drop_column("reminded_at")
+        batch_op.drop_column("due_at")
+        batch_op.drop_column("completed_at")
+        batch_op.drop_column("created_at")
+        batch_op.drop_column("owner_id")
@@ -0,0 +1,80 @@
+"""tasks archive
+
+Adds tasks_archive, which holds completed tasks moved out of the hot tasks
+table, and the partial index the archiver scans on. The new table is empty,
+so its indexes are built inline; the tasks index is built CONCURRENTLY on
+Postgres.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARCHIVE_INDEXES = [
+    ("ix_tasks_archive_owner_id_id", ["owner_id", "id"], {}),
+    ("ix_tasks_archive_owner_title", ["owner_id", "title"], {}),
+    ("ix_tasks_archive_owner_title_pattern", ["owner_id", "title"], {"postgresql_ops": {"title": "text_pattern_ops"}}),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _outside_transaction():
+    # CONCURRENTLY cannot run inside a transaction block
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("completed", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("due_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for name, columns, kwargs in ARCHIVE_INDEXES:
+        op.create_index(name, "tasks_archive", columns, **kwargs)
+
+    with _outside_transaction():
+        op.create_index(
+            "ix_tasks_completed_at_done",
+            "tasks",
+            ["completed_at"],
+            postgresql_where=sa.text("completed"),
+            sqlite_where=sa.text("completed"),
+            postgresql_concurrently=_is_postgres(),
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # Archived rows go back to the hot table before the archive is dropped
+    op.execute(
+        "INSERT INTO tasks (id, owner_id, title, description, completed, created_at, completed_at, due_at) "
+        "SELECT id, owner_id, title, description, completed, created_at, completed_at, due_at FROM tasks_archive"
+    )
+    with _outside_transaction():
+        op.drop_index("ix_tasks_completed_at_done", table_name="tasks", postgresql_concurrently=_is_postgres(), if_exists=True)
+    op.drop_table("tasks_archive")
@@ -0,0 +1,67 @@
+"""title sort tiebreaker
+
+The title sorts order by (title, id) so pages are stable when titles repeat.
+The title indexes gain a trailing id column to serve that order. The new
+indexes are built before the old ones are dropped, so reads are never
+without one; on Postgres both steps run CONCURRENTLY.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, old index, old columns, new index, new columns)
+REPLACED_INDEXES = [
+    ("tasks", "ix_tasks_owner_title", ["owner_id", "title"], "ix_tasks_owner_title_id", ["owner_id", "title", "id"]),
+    (
+        "tasks",
+        "ix_tasks_owner_completed_title",
+        ["owner_id", "completed", "title"],
+        "ix_tasks_owner_completed_title_id",
+        ["owner_id", "completed", "title", "id"],
+    ),
+    (
+        "tasks_archive",
+        "ix_tasks_archive_owner_title",
+        ["owner_id", "title"],
+        "ix_tasks_archive_owner_title_id",
+        ["owner_id", "title", "id"],
+    ),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _outside_transaction():
+    # CONCURRENTLY cannot run inside a transaction block
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def upgrade() -> None:
+    concurrently = _is_postgres()
+    with _outside_transaction():
+        for table, old_name, _, new_name, new_columns in REPLACED_INDEXES:
+            op.create_index(new_name, table, new_columns, postgresql_concurrently=concurrently, if_not_exists=True)
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=concurrently, if_exists=True)
+
+
+def downgrade() -> None:
+    concurrently = _is_postgres()
+    with _outside_transaction():
+        for table, old_name, old_columns, new_name, _ in REPLACED_INDEXES:
+            op.create_index(old_name, table, old_columns, postgresql_concurrently=concurrently, if_not_exists=True)
+            op.drop_index(new_name, table_name=table, postgresql_concurrently=concurrently, if_exists=True)
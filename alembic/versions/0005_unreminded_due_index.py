@@ -0,0 +1,67 @@
+"""unreminded due index
+
+The reminder index covers only pending tasks that have not been reminded, so
+the scans, including the backfill pass over the last day, never read rows
+that were already claimed. The new index is built before the old one is
+dropped; on Postgres both steps run CONCURRENTLY.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = "NOT completed"
+UNREMINDED = "NOT completed AND reminded_at IS NULL"
+# SQLite only matches a partial index on the predicate's exact form, and
+# SQLAlchemy renders "not completed" there as "completed = 0"
+SQLITE_UNREMINDED = "completed = 0 AND reminded_at IS NULL"
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _outside_transaction():
+    # CONCURRENTLY cannot run inside a transaction block
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def _create(name: str, where: str, sqlite_where: str):
+    op.create_index(
+        name,
+        "tasks",
+        ["due_at"],
+        postgresql_where=sa.text(where),
+        sqlite_where=sa.text(sqlite_where),
+        postgresql_concurrently=_is_postgres(),
+        if_not_exists=True,
+    )
+
+
+def _drop(name: str):
+    op.drop_index(name, table_name="tasks", postgresql_concurrently=_is_postgres(), if_exists=True)
+
+
+def upgrade() -> None:
+    with _outside_transaction():
+        _create("ix_tasks_due_at_unreminded", UNREMINDED, SQLITE_UNREMINDED)
+        _drop("ix_tasks_due_at_pending")
+
+
+def downgrade() -> None:
+    with _outside_transaction():
+        _create("ix_tasks_due_at_pending", PENDING, PENDING)
+        _drop("ix_tasks_due_at_unreminded")
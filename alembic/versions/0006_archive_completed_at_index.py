@@ -0,0 +1,52 @@
+"""archive completed_at index
+
+Analytics reads only the archived tasks completed inside its window and
+counts the rest, so tasks_archive gets an (owner_id, completed_at) index.
+The archive already holds rows, so on Postgres it is built CONCURRENTLY.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _outside_transaction():
+    # CONCURRENTLY cannot run inside a transaction block
+    return op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+
+
+def upgrade() -> None:
+    with _outside_transaction():
+        op.create_index(
+            "ix_tasks_archive_owner_completed_at",
+            "tasks_archive",
+            ["owner_id", "completed_at"],
+            postgresql_concurrently=_is_postgres(),
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with _outside_transaction():
+        op.drop_index(
+            "ix_tasks_archive_owner_completed_at",
+            table_name="tasks_archive",
+            postgresql_concurrently=_is_postgres(),
+            if_exists=True,
+        )
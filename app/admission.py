@@ -0,0 +1,165 @@
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import anyio.to_thread
+import redis.asyncio as aioredis
+
+from app.auth import get_token_claims
+from app.config import settings
+
+CHAT = "chat"
+CRUD = "crud"
+
+# request.state attribute holding the verified claims of the request's bearer token
+TOKEN_CLAIMS_STATE = "token_claims"
+
+# Refill-and-take on one bucket; returns {allowed, seconds until a token is available}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RouteGroup:
+    """Concurrency limit, bounded wait queue and rate limit for one group of routes"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, rate_per_minute: float, burst: int):
+        self.name = name
+        self.max_queue = max_queue
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.active = 0
+
+
+groups = {
+    CHAT: RouteGroup(CHAT, settings.chat_max_concurrency, settings.chat_max_queue, settings.chat_rate_per_minute, settings.chat_burst),
+    CRUD: RouteGroup(CRUD, settings.crud_max_concurrency, settings.crud_max_queue, settings.crud_rate_per_minute, settings.crud_burst),
+}
+
+def route_group(path: str) -> Optional[str]:
+    if path.startswith("/api/v1/chatbot"):
+        return CHAT
+    if path.startswith("/api/v1/"):
+        return CRUD
+    return None
+
+
+class AdmissionControlMiddleware:
+    """
+    Rejects requests before they reach a handler when their route group is
+    over budget: 429 when the caller's token bucket is empty, 503 when the
+    group's queue is full. When a worker's total queue gets deep, chat is
+    shed first so cheap CRUD requests keep flowing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        self.token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def __call__(self, scope, receive, send):
+        group_name = route_group(scope["path"]) if scope["type"] == "http" else None
+        if group_name is None:
+            return await self.app(scope, receive, send)
+        group = groups[group_name]
+
+        retry_after = await self._take_token(group, self._identity(scope))
+        if retry_after is not None:
+            return await self._reject(send, 429, retry_after, "Rate limit exceeded")
+
+        total_waiting = sum(g.waiting for g in groups.values())
+        if group.waiting >= group.max_queue or (
+            group_name == CHAT and total_waiting >= settings.admission_shed_queue_depth
+        ):
+            return await self._reject(send, 503, 1, "Server busy, please retry")
+
+        group.waiting += 1
+        try:
+            await group.semaphore.acquire()
+        finally:
+            group.waiting -= 1
+        group.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.active -= 1
+            group.semaphore.release()
+
+    def _identity(self, scope) -> str:
+        # Only the first Authorization header, the one get_current_user reads
+        value = next((value for name, value in scope["headers"] if name == b"authorization"), b"")
+        scheme, _, token = value.decode("latin-1").partition(" ")
+        if scheme.lower() == "bearer":
+            claims = get_token_claims(token)
+            if claims and claims.get("sub"):
+                # Handed on to get_current_user, so the token is decoded once per request
+                scope.setdefault("state", {})[TOKEN_CLAIMS_STATE] = claims
+                return f"user:{claims['sub']}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def _take_token(self, group: RouteGroup, identity: str) -> Optional[float]:
+        try:
+            allowed, retry_after = await self.token_bucket(
+                keys=[f"ratelimit:{group.name}:{identity}"],
+                args=[group.rate, group.burst, time.time()],
+            )
+        except Exception as e:
+            # Fail open: losing Redis should not take the API down with it
+            print(f"Rate limiter unavailable: {e}")
+            return None
+        return None if int(allowed) else float(retry_after)
+
+    async def _reject(self, send, status_code: int, retry_after: float, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def configure_executors():
+    """
+    Sync CRUD handlers run on anyio's threadpool; blocking chat work (LLM
+    clients, agent tools) goes to the loop's default executor, so a chat
+    spike cannot take the threads CRUD needs. Call from the running loop.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.crud_threadpool_size
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.chat_executor_threads, thread_name_prefix="chat")
+    )
+
+
+def get_admission_stats() -> dict:
+    return {
+        name: {"active": group.active, "waiting": group.waiting}
+        for name, group in groups.items()
+    }
@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
@@ -8,6 +9,10 @@ from llama_index.core.node_parser import SimpleNodeParser
 import json
 
 from app.agents.base_agent import BaseAgent, Message
+from app.agents.conversation_memory import to_langchain_messages
+
+# Default for process_message: build a context index for this message alone
+_NEW_INDEX = object()
 
 class ChatResponseAgent(BaseAgent):
     def __init__(self, openai_api_key: str):
@@ -72,32 +77,57 @@ Always be helpful, friendly, and focused on the user's productivity goals."""
             print(f"Error creating context documents: {e}")
             return None
     
-    async def process_message(self, message: Message) -> Message:
-        """Process message from TaskRetrievalAgent and generate user response"""
+    async def build_context_index(self, task_data) -> Optional[VectorStoreIndex]:
+        """
+        Index task data once so several questions about it can share it; the
+        embedding calls block, so it runs on the chat executor
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._create_context_documents, task_data)
+    
+    def _enhance_context(self, index: Optional[VectorStoreIndex], task_data, original_query: str) -> str:
+        if not index:
+            return str(task_data)
+        
+        # Use LlamaIndex query engine for enhanced context
+        query_engine = index.as_query_engine(llm=self.llama_llm)
+        context_response = query_engine.query(f"Based on this task data, help answer: {original_query}")
+        return str(context_response)
+    
+    async def process_message(self, message: Message, context_index=_NEW_INDEX) -> Message:
+        """
+        Process message from TaskRetrievalAgent and generate user response.
+        Pass context_index from build_context_index to reuse an index built
+        for the same task data.
+        """
+        status = "success"
         try:
             message_content = message.content
             
             if message_content.get("status") == "error":
+                status = "error"
                 response_text = f"I'm sorry, I encountered an error while retrieving your task information: {message_content.get('error', 'Unknown error')}"
             else:
                 # Extract task data
                 task_data = message_content.get("data", "")
                 original_query = message_content.get("query_processed", "")
                 
-                # Create enhanced context using LlamaIndex
-                index = self._create_context_documents(task_data)
-                
-                if index:
-                    # Use LlamaIndex query engine for enhanced context
-                    query_engine = index.as_query_engine(llm=self.llama_llm)
-                    context_response = query_engine.query(f"Based on this task data, help answer: {original_query}")
-                    enhanced_context = str(context_response)
-                else:
-                    enhanced_context = str(task_data)
+                # Create enhanced context using LlamaIndex; it blocks on network
+                # calls, so it runs on the loop's default executor, which the app
+                # reserves for chat work
+                if context_index is _NEW_INDEX:
+                    context_index = await self.build_context_index(task_data)
+                loop = asyncio.get_running_loop()
+                enhanced_context = await loop.run_in_executor(
+                    None, self._enhance_context, context_index, task_data, original_query
+                )
                 
                 # Create prompt with context
+                # Earlier turns go in as messages, not template text, so their
+                # content is never parsed as template variables
                 prompt = ChatPromptTemplate.from_messages([
                     ("system", self.system_prompt),
+                    *to_langchain_messages(message_content.get("history", [])),
                     ("human", f"""
 User asked: {original_query}
 
@@ -115,12 +145,14 @@ Make it conversational and actionable, not just a data dump.
                 response_text = response.content
         
         except Exception as e:
+            status = "error"
             response_text = f"I apologize, but I encountered an error while processing your request: {str(e)}"
         
         # Create response message
         response_message = self.create_message(
             receiver="user",
             content={
+                "status": status,
                 "response": response_text,
                 "agent_type": "chat_response"
             },
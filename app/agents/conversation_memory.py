@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional, OrderedDict, Tuple
+import asyncio
+import time
+
+import tiktoken
+from langchain_openai import ChatOpenAI
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from app.config import settings
+
+_encoding = None
+
+def _get_encoding():
+    # Loaded lazily: the first call may download the BPE ranks
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    return len(_get_encoding().encode(text))
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = _get_encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _get_encoding().decode(tokens[:max_tokens])
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a ToDo assistant.
+Update the summary with the new turns below. Keep what a follow-up question might refer to:
+the tasks, filters, dates and decisions discussed. Drop greetings and repetition.
+Answer with the updated summary only, in at most {max_tokens} tokens.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}"""
+
+
+class ConversationMemory:
+    """
+    Memory for one conversation: the last K turns verbatim plus a running
+    summary of everything older. Turns that fall out of the window are folded
+    into the summary in the background, so answering never waits on it.
+    """
+
+    def __init__(self, summarizer: ChatOpenAI):
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self._pending: List[Tuple[str, str]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.last_used = time.monotonic()
+
+    def add_turn(self, query: str, response: str):
+        self.turns.append((query, response))
+        overflow = len(self.turns) - settings.chat_memory_turns
+        if overflow > 0:
+            self._pending.extend(self.turns[:overflow])
+            del self.turns[:overflow]
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._fold())
+
+    async def _fold(self):
+        # One fold at a time per conversation; turns that overflow meanwhile are
+        # picked up by the next pass of the loop
+        while self._pending:
+            batch, self._pending = self._pending, []
+            turns = "\n".join(f"User: {query}\nAssistant: {response}" for query, response in batch)
+            prompt = SUMMARY_PROMPT.format(
+                max_tokens=settings.chat_memory_summary_max_tokens,
+                summary=self.summary or "(empty)",
+                turns=truncate_tokens(turns, settings.chat_memory_max_tokens),
+            )
+            try:
+                result = await self.summarizer.ainvoke(prompt)
+                self.summary = truncate_tokens(result.content.strip(), settings.chat_memory_summary_max_tokens)
+            except Exception as e:
+                # The folded turns are dropped; the old summary is still valid
+                print(f"Error summarizing conversation: {e}")
+
+    def get_context(self) -> List[Dict[str, str]]:
+        """
+        Summary and recent turns as plain {"role", "content"} entries, newest
+        turns first to claim the token budget, so prompt size stays bounded
+        however long the conversation runs
+        """
+        budget = settings.chat_memory_max_tokens
+        summary = []
+        if self.summary:
+            summary = [{"role": "summary", "content": self.summary}]
+            budget -= count_tokens(self.summary)
+
+        recent = []
+        for query, response in reversed(self.turns):
+            turn = [{"role": "user", "content": query}, {"role": "assistant", "content": response}]
+            cost = count_tokens(query) + count_tokens(response)
+            if cost > budget:
+                # The previous turn is what follow-ups refer to most; keep it, cut down
+                if not recent and budget > 1:
+                    recent = [
+                        {"role": "user", "content": truncate_tokens(query, budget // 2)},
+                        {"role": "assistant", "content": truncate_tokens(response, budget // 2)},
+                    ]
+                break
+            recent = turn + recent
+            budget -= cost
+        return summary + recent
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+class ConversationMemoryStore:
+    """
+    Conversation memories keyed by user and conversation, so ids can't be
+    borrowed across users. Memories live in this worker only and are evicted
+    least recently used first, beyond a count cap or after sitting idle.
+    """
+
+    def __init__(self, openai_api_key: str):
+        self.summarizer = ChatOpenAI(
+            model="gpt-3.5-turbo",
+            temperature=0,
+            max_tokens=settings.chat_memory_summary_max_tokens,
+            api_key=openai_api_key
+        )
+        self.memories: OrderedDict[Tuple[Optional[int], str], ConversationMemory] = OrderedDict()
+
+    def get(self, user_id: Optional[int], conversation_id: str) -> ConversationMemory:
+        key = (user_id, conversation_id)
+        memory = self.memories.get(key)
+        if memory is None:
+            memory = self.memories[key] = ConversationMemory(self.summarizer)
+        self.memories.move_to_end(key)
+        memory.last_used = time.monotonic()
+        self._evict()
+        return memory
+
+    def _evict(self):
+        idle_before = time.monotonic() - settings.chat_memory_idle_seconds
+        while self.memories:
+            key, oldest = next(iter(self.memories.items()))
+            if len(self.memories) <= settings.chat_memory_max_conversations and oldest.last_used >= idle_before:
+                break
+            self.memories.pop(key).cancel()
+
+    def reset(self, user_id: Optional[int], conversation_id: str):
+        memory = self.memories.pop((user_id, conversation_id), None)
+        if memory is not None:
+            memory.cancel()
+
+    def clear(self):
+        for memory in self.memories.values():
+            memory.cancel()
+        self.memories.clear()
+
+
+def to_langchain_messages(context: List[Dict[str, str]]) -> List[BaseMessage]:
+    """Turn memory context entries into chat messages for a prompt"""
+    messages = []
+    for entry in context:
+        if entry["role"] == "summary":
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation: {entry['content']}"))
+        elif entry["role"] == "user":
+            messages.append(HumanMessage(content=entry["content"]))
+        else:
+            messages.append(AIMessage(content=entry["content"]))
+    return messages
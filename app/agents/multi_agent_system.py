@@ -1,17 +1,21 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
 from datetime import datetime
 
 from app.agents.base_agent import BaseAgent, Message
 from app.agents.task_retrieval_agent import TaskRetrievalAgent
 from app.agents.chat_response_agent import ChatResponseAgent
+from app.agents.conversation_memory import ConversationMemoryStore
 from app.config import settings
 
 class MultiAgentSystem:
     def __init__(self):
         self.agents: Dict[str, BaseAgent] = {}
         self.conversation_history: List[Message] = []
-        self.active_conversations: Dict[str, List[Message]] = {}
+        # Keyed by owner and conversation id, like the memory store, so a
+        # conversation id never reaches another user's messages
+        self.active_conversations: Dict[Tuple[Optional[int], str], List[Message]] = {}
+        self.memory = ConversationMemoryStore(openai_api_key=settings.openai_api_key)
         
         # Initialize agents
         self._initialize_agents()
@@ -34,61 +38,153 @@ class MultiAgentSystem:
             print(f"Error initializing agents: {e}")
             raise
     
-    async def process_user_query(self, user_query: str, conversation_id: str = "default") -> str:
+    async def process_user_query(self, user_query: str, conversation_id: str = "default", user_id: Optional[int] = None) -> str:
         """
         Process user query through the multi-agent system
         
         Flow:
-        1. User query → TaskRetrievalAgent
-        2. TaskRetrievalAgent → ChatResponseAgent  
-        3. ChatResponseAgent → User response
+        1. User query + conversation memory → TaskRetrievalAgent
+        2. TaskRetrievalAgent + conversation memory → ChatResponseAgent
+        3. ChatResponseAgent → User response; the turn is added to memory
         """
         try:
+            memory = self.memory.get(user_id, conversation_id)
+            history = memory.get_context()
+            
             # Create initial user message
             user_message = Message(
                 id=f"user_{datetime.utcnow().timestamp()}",
                 sender="user",
                 receiver="TaskRetrievalAgent",
-                content={"query": user_query},
+                content={"query": user_query, "user_id": user_id},
                 timestamp=datetime.utcnow(),
                 message_type="user_query"
             )
             
             # Add to conversation history
-            if conversation_id not in self.active_conversations:
-                self.active_conversations[conversation_id] = []
-            
-            self.active_conversations[conversation_id].append(user_message)
+            conversation = self.active_conversations.setdefault((user_id, conversation_id), [])
+            conversation.append(user_message)
             self.conversation_history.append(user_message)
             
             # Step 1: Send to TaskRetrievalAgent
             task_agent = self.agents["TaskRetrievalAgent"]
-            retrieval_response = await task_agent.process_message(user_message)
+            retrieval_response = await task_agent.process_message(self._with_history(user_message, history))
             
-            self.active_conversations[conversation_id].append(retrieval_response)
+            conversation.append(retrieval_response)
             self.conversation_history.append(retrieval_response)
             
             # Step 2: Send TaskRetrievalAgent response to ChatResponseAgent
             chat_agent = self.agents["ChatResponseAgent"]
-            final_response = await chat_agent.process_message(retrieval_response)
+            final_response = await chat_agent.process_message(self._with_history(retrieval_response, history))
             
-            self.active_conversations[conversation_id].append(final_response)
+            conversation.append(final_response)
             self.conversation_history.append(final_response)
             
+            response_text = final_response.content.get("response", "I'm sorry, I couldn't process your request.")
+            if final_response.content.get("status", "success") == "success":
+                # Summarizing older turns happens in the background
+                memory.add_turn(user_query, response_text)
+            
             # Return the final response text
-            return final_response.content.get("response", "I'm sorry, I couldn't process your request.")
+            return response_text
         
         except Exception as e:
             error_message = f"System error: {str(e)}"
             print(f"Error in process_user_query: {e}")
             return error_message
     
-    def get_conversation_history(self, conversation_id: str = "default", limit: int = 10) -> List[Dict]:
-        """Get conversation history for a specific conversation"""
-        if conversation_id not in self.active_conversations:
-            return []
+    async def process_user_queries(
+        self,
+        user_queries: List[str],
+        conversation_id: str = "default",
+        user_id: Optional[int] = None,
+        max_concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer several questions with a single retrieval pass
+        
+        Flow:
+        1. All queries → TaskRetrievalAgent, once
+        2. Shared task data → one LlamaIndex context index, built once
+        3. Shared data and index → ChatResponseAgent, one call per query, run concurrently
+        
+        Returns one {"query", "status", "response"} entry per query, in order;
+        a failed answer doesn't fail the others.
+        """
+        combined_query = "Retrieve the task data needed to answer all of these questions:\n" + "\n".join(
+            f"{number}. {query}" for number, query in enumerate(user_queries, start=1)
+        )
+        user_message = Message(
+            id=f"user_{datetime.utcnow().timestamp()}",
+            sender="user",
+            receiver="TaskRetrievalAgent",
+            content={"query": combined_query, "user_id": user_id},
+            timestamp=datetime.utcnow(),
+            message_type="user_query"
+        )
+        
+        memory = self.memory.get(user_id, conversation_id)
+        history = memory.get_context()
+        
+        conversation = self.active_conversations.setdefault((user_id, conversation_id), [])
+        conversation.append(user_message)
+        self.conversation_history.append(user_message)
+        
+        # Step 1: one retrieval shared by every question
+        retrieval_response = await self.agents["TaskRetrievalAgent"].process_message(
+            self._with_history(user_message, history)
+        )
+        conversation.append(retrieval_response)
+        self.conversation_history.append(retrieval_response)
+        
+        # Step 2: index the shared data once; every answer queries the same index
+        chat_agent = self.agents["ChatResponseAgent"]
+        context_index = None
+        if retrieval_response.content.get("status") != "error":
+            context_index = await chat_agent.build_context_index(retrieval_response.content.get("data", ""))
+        
+        # Step 3: answer each question from the shared data, a few at a time
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def answer(query: str) -> Message:
+            question_message = retrieval_response.model_copy(
+                update={"content": {**retrieval_response.content, "query_processed": query, "history": history}}
+            )
+            async with semaphore:
+                return await chat_agent.process_message(question_message, context_index=context_index)
+        
+        results = await asyncio.gather(*(answer(query) for query in user_queries), return_exceptions=True)
+        
+        answers = []
+        for query, result in zip(user_queries, results):
+            if isinstance(result, Exception):
+                answers.append({"query": query, "status": "error", "response": f"System error: {str(result)}"})
+                continue
+            conversation.append(result)
+            self.conversation_history.append(result)
+            answer = {
+                "query": query,
+                "status": result.content.get("status", "success"),
+                "response": result.content.get("response", "I'm sorry, I couldn't process your request.")
+            }
+            if answer["status"] == "success":
+                memory.add_turn(query, answer["response"])
+            answers.append(answer)
+        return answers
+    
+    def _with_history(self, message: Message, history: List[Dict[str, str]]) -> Message:
+        """Copy of a message carrying the conversation memory; stored messages stay without it"""
+        return message.model_copy(update={"content": {**message.content, "history": history}})
+    
+    def get_conversation_history(
+        self, conversation_id: str = "default", user_id: Optional[int] = None, limit: int = 10
+    ) -> Optional[List[Dict]]:
+        """Get conversation history for one of the user's conversations; None if they have no such conversation"""
+        conversation = self.active_conversations.get((user_id, conversation_id))
+        if conversation is None:
+            return None
         
-        messages = self.active_conversations[conversation_id][-limit:]
+        messages = conversation[-limit:]
         return [
             {
                 "id": msg.id,
@@ -110,10 +206,11 @@ class MultiAgentSystem:
             "system_status": "active"
         }
     
-    async def reset_conversation(self, conversation_id: str):
-        """Reset a specific conversation"""
-        if conversation_id in self.active_conversations:
-            del self.active_conversations[conversation_id]
+    async def reset_conversation(self, conversation_id: str, user_id: Optional[int] = None) -> bool:
+        """Reset one of the user's conversations; False if they have no such conversation"""
+        found = self.active_conversations.pop((user_id, conversation_id), None) is not None
+        self.memory.reset(user_id, conversation_id)
+        return found
     
     async def shutdown(self):
         """Gracefully shutdown the multi-agent system"""
@@ -122,6 +219,7 @@ class MultiAgentSystem:
         self.agents.clear()
         self.conversation_history.clear()
         self.active_conversations.clear()
+        self.memory.clear()
 
 # Global instance
 multi_agent_system = MultiAgentSystem()
\ No newline at end of file
@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from langchain.tools import BaseTool
@@ -7,22 +8,32 @@ from langchain.prompts import ChatPromptTemplate
 from pydantic import Field
 
 from app.agents.base_agent import BaseAgent, Message
+from app.agents.conversation_memory import to_langchain_messages
+from app.cache import get_redis, reads_need_primary
 from app.crud import tasks as crud_tasks
+from app.crud.analytics import get_cached_task_analytics
 from app.models.tasks import Task
 from app.database import SessionLocal
 
+# Owner of the query being processed; tools only ever see this user's tasks
+current_owner_id: ContextVar[Optional[int]] = ContextVar("current_owner_id", default=None)
+
 class TaskRetrievalTool(BaseTool):
     name: str = "get_tasks"
-    description: str = "Retrieve tasks from the database based on filters"
+    description: str = (
+        "Retrieve tasks from the database based on filters. Tasks completed long ago are "
+        "archived; set include_archived only when the user asks about old or past tasks"
+    )
     
-    def _run(self, query: str = "", completed: Optional[bool] = None, limit: int = 100) -> List[Dict]:
-        db = SessionLocal()
+    def _run(self, query: str = "", completed: Optional[bool] = None, limit: int = 100, include_archived: bool = False) -> List[Dict]:
+        owner_id = current_owner_id.get()
+        if owner_id is None:
+            return []
+        db = SessionLocal(primary=reads_need_primary(get_redis(), owner_id))
         try:
-            tasks = crud_tasks.get_tasks(db, skip=0, limit=limit)
-            
-            # Filter by completion status if specified
-            if completed is not None:
-                tasks = [task for task in tasks if task.completed == completed]
+            tasks = crud_tasks.get_tasks(
+                db, owner_id=owner_id, skip=0, limit=limit, completed=completed, include_archived=include_archived
+            )
             
             # Simple text search in title and description
             if query:
@@ -51,21 +62,39 @@ class TaskStatsTool(BaseTool):
     description: str = "Get statistics about tasks"
     
     def _run(self) -> Dict:
-        db = SessionLocal()
+        owner_id = current_owner_id.get()
+        if owner_id is None:
+            return {"total_tasks": 0, "completed_tasks": 0, "pending_tasks": 0, "completion_rate": 0}
+        db = SessionLocal(primary=reads_need_primary(get_redis(), owner_id))
         try:
-            all_tasks = crud_tasks.get_tasks(db, skip=0, limit=1000)
-            completed_tasks = [task for task in all_tasks if task.completed]
-            pending_tasks = [task for task in all_tasks if not task.completed]
+            # Archived tasks still count towards the totals
+            total_tasks = crud_tasks.count_tasks(db, owner_id=owner_id, include_archived=True)
+            completed_tasks = crud_tasks.count_tasks(db, owner_id=owner_id, completed=True, include_archived=True)
             
             return {
-                "total_tasks": len(all_tasks),
-                "completed_tasks": len(completed_tasks),
-                "pending_tasks": len(pending_tasks),
-                "completion_rate": len(completed_tasks) / len(all_tasks) * 100 if all_tasks else 0
+                "total_tasks": total_tasks,
+                "completed_tasks": completed_tasks,
+                "pending_tasks": total_tasks - completed_tasks,
+                "completion_rate": completed_tasks / total_tasks * 100 if total_tasks else 0
             }
         finally:
             db.close()
 
+class TaskAnalyticsTool(BaseTool):
+    name: str = "get_task_analytics"
+    description: str = (
+        "Get a precomputed productivity summary: completion trend per day or week, "
+        "overdue and due-soon counts, the next due tasks and lead times"
+    )
+    
+    def _run(self, period: str = "day", days: int = 30) -> Dict:
+        owner_id = current_owner_id.get()
+        if owner_id is None:
+            return {}
+        if period not in ("day", "week"):
+            period = "day"
+        return get_cached_task_analytics(get_redis(), SessionLocal, owner_id, period=period, days=days)
+
 class TaskRetrievalAgent(BaseAgent):
     # ...existing imports...
 
@@ -78,7 +107,7 @@ class TaskRetrievalAgent(BaseAgent):
             api_key=openai_api_key  # Changed from openai_api_key to api_key
         )
         
-        self.tools = [TaskRetrievalTool(), TaskStatsTool()]
+        self.tools = [TaskRetrievalTool(), TaskStatsTool(), TaskAnalyticsTool()]
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a task retrieval agent. Your job is to:
@@ -90,8 +119,16 @@ class TaskRetrievalAgent(BaseAgent):
 Available tools:
 - get_tasks: Retrieve tasks with optional filtering
 - get_task_stats: Get overall task statistics
+- get_task_analytics: Get trends, deadlines (overdue, due soon) and productivity metrics
+
+For questions about deadlines, productivity or progress over time, use get_task_analytics
+and pass its summary on; do not list every task.
+
+Earlier turns of the conversation may precede the query; use them to resolve follow-up
+questions ("those", "the second one"), but always retrieve fresh data.
 
 Always provide structured data that the response agent can use to answer user questions."""),
+            ("placeholder", "{chat_history}"),
             ("human", "{input}"),
             ("placeholder", "{agent_scratchpad}")
         ])
@@ -103,9 +140,13 @@ Always provide structured data that the response agent can use to answer user qu
         """Process message and retrieve relevant task data"""
         try:
             user_query = message.content.get("query", "")
+            current_owner_id.set(message.content.get("user_id"))
             
             # Use LangChain agent to process the query and retrieve data
-            result = await self.agent_executor.ainvoke({"input": user_query})
+            result = await self.agent_executor.ainvoke({
+                "input": user_query,
+                "chat_history": to_langchain_messages(message.content.get("history", []))
+            })
             
             response_content = {
                 "status": "success",
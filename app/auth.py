@@ -1,9 +1,12 @@
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.cache import get_redis, subscribe
 from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -11,6 +14,47 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = settings.algorithm
 SECRET_KEY = settings.secret_key
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
+
+# Revoked access-token jtis: a sorted set scored by token expiry is the source
+# of truth, and each worker mirrors it in memory via pub/sub
+REVOKED_TOKENS_KEY = "auth:revoked"
+REVOKED_TOKENS_CHANNEL = "auth:revoked"
+
+
+class RevokedTokens:
+    """
+    In-process set of revoked jtis still within their lifetime, so checking a
+    token on every request needs no network round-trip. Entries drop out once
+    the token would have expired anyway, which keeps the set small.
+    """
+
+    def __init__(self):
+        self._expiry = {}
+        self._next_prune = 0.0
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expiry
+
+    def add(self, jti: str, exp: float):
+        self._expiry[jti] = exp
+        now = time.time()
+        if now >= self._next_prune:
+            self._expiry = {key: value for key, value in self._expiry.items() if value > now}
+            self._next_prune = now + 60
+
+    def on_message(self, data: str):
+        jti, _, exp = data.partition(":")
+        self.add(jti, float(exp))
+
+    def reload(self):
+        # Called after every (re)subscribe, so nothing published while disconnected is missed
+        entries = get_redis().zrangebyscore(REVOKED_TOKENS_KEY, time.time(), "+inf", withscores=True)
+        self._expiry = dict(entries)
+
+
+revoked_tokens = RevokedTokens()
+subscribe(REVOKED_TOKENS_CHANNEL, revoked_tokens.on_message, on_connect=revoked_tokens.reload)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,16 +68,102 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str, credentials_exception):
+def verify_token(token: str, credentials_exception, claims: Optional[dict] = None):
+    """
+    Username of a valid, unrevoked access token. claims, when given, are this
+    token's already verified claims (see get_token_claims); they skip the
+    decode but are checked like a freshly decoded token.
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = claims if claims is not None else jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("type") == "refresh":
+            raise credentials_exception
+        if payload.get("jti") in revoked_tokens:
             raise credentials_exception
         return username
     except JWTError:
-        raise credentials_exception 
\ No newline at end of file
+        raise credentials_exception
+
+def revoke_access_token(token: str):
+    """Revoke an access token everywhere until it expires"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return
+    jti, exp = payload.get("jti"), payload.get("exp")
+    if not jti or not exp:
+        return
+    revoked_tokens.add(jti, exp)
+    pipe = get_redis().pipeline()
+    pipe.zadd(REVOKED_TOKENS_KEY, {jti: exp})
+    pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", time.time())
+    pipe.publish(REVOKED_TOKENS_CHANNEL, f"{jti}:{exp}")
+    pipe.execute()
+
+def _refresh_key(jti: str) -> str:
+    return f"auth:refresh:{jti}"
+
+def _refresh_family_key(family: str) -> str:
+    return f"auth:refresh_family:{family}"
+
+def create_refresh_token(username: str, family: Optional[str] = None) -> str:
+    """
+    Issue a single-use refresh token. Tokens rotated from the same login share
+    a family, so presenting an already-used token can revoke the whole chain.
+    """
+    family = family or uuid.uuid4().hex
+    jti = uuid.uuid4().hex
+    expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ttl = int(expires_delta.total_seconds())
+    pipe = get_redis().pipeline()
+    pipe.set(_refresh_key(jti), family, ex=ttl)
+    pipe.set(_refresh_family_key(family), username, ex=ttl)
+    pipe.execute()
+    payload = {
+        "sub": username,
+        "exp": datetime.utcnow() + expires_delta,
+        "jti": jti,
+        "family": family,
+        "type": "refresh",
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+def rotate_refresh_token(token: str, credentials_exception) -> Tuple[str, str]:
+    """Consume a refresh token and return (username, new refresh token)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("type") != "refresh":
+        raise credentials_exception
+    username, jti, family = payload.get("sub"), payload.get("jti"), payload.get("family")
+
+    redis_client = get_redis()
+    if redis_client.getdel(_refresh_key(jti)) is None:
+        # Already used or revoked: treat as theft and end the whole session
+        redis_client.delete(_refresh_family_key(family))
+        raise credentials_exception
+    if redis_client.get(_refresh_family_key(family)) != username:
+        raise credentials_exception
+    return username, create_refresh_token(username, family=family)
+
+def revoke_refresh_family(token: str):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return
+    if payload.get("type") == "refresh" and payload.get("family"):
+        get_redis().delete(_refresh_family_key(payload["family"]))
+
+
+def get_token_claims(token: str) -> Optional[dict]:
+    """Claims of a token with a valid signature and expiry, or None; for callers that must not raise"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
@@ -1,9 +1,26 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
 import redis
 from app.config import settings
 
+# One connection pool per process, shared by request handlers and helpers
+redis_pool = redis.ConnectionPool.from_url(settings.redis_url, decode_responses=True)
+
+# Every worker drops matching L1 entries when a key prefix is published here
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+def get_redis() -> redis.Redis:
+    return redis.Redis(connection_pool=redis_pool)
+
 def get_redis_client():
     try:
-        r = redis.from_url(settings.redis_url, decode_responses=True)
+        r = get_redis()
         yield r
     except Exception as e:
         print(f"Could not connect to Redis: {e}")
@@ -13,4 +30,295 @@ def get_redis_client():
     finally:
         # In some cases, you might want to explicitly close the connection, but
         # redis-py's connection pooling generally handles this.
-        pass 
\ No newline at end of file
+        pass 
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a per-entry TTL and a total size limit in bytes,
+    used as L1 in front of Redis. It stays disabled until the invalidation
+    listener is running, so a process that cannot hear invalidations never
+    serves from it.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = False
+        # Bumped on every invalidation; fills that started before one are dropped
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, size: int, generation: int):
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def drop_prefix(self, prefix: str):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0}
+
+    def incr(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        l1_total = counts["l1_hits"] + counts["l1_misses"]
+        l2_total = counts["l2_hits"] + counts["l2_misses"]
+        counts["l1_hit_ratio"] = counts["l1_hits"] / l1_total if l1_total else 0.0
+        counts["l2_hit_ratio"] = counts["l2_hits"] / l2_total if l2_total else 0.0
+        counts["l1_bytes"] = local_cache._size
+        return counts
+
+
+local_cache = LocalCache(max_bytes=settings.l1_cache_max_bytes, ttl=settings.l1_cache_ttl)
+cache_stats = CacheStats()
+
+def get_cache_stats() -> dict:
+    return cache_stats.snapshot()
+
+def invalidate_prefix(redis_client, prefix: str):
+    """Drop L1 entries under prefix here right away and in every other worker via pub/sub"""
+    local_cache.drop_prefix(prefix)
+    redis_client.publish(INVALIDATION_CHANNEL, prefix)
+
+# channel -> (on_message, on_connect, on_disconnect), served by one listener thread per process
+_subscriptions: Dict[str, Tuple[Callable[[str], None], Optional[Callable[[], None]], Optional[Callable[[], None]]]] = {}
+
+def subscribe(
+    channel: str,
+    on_message: Callable[[str], None],
+    on_connect: Optional[Callable[[], None]] = None,
+    on_disconnect: Optional[Callable[[], None]] = None,
+):
+    """
+    Register a pub/sub handler. on_connect runs after every (re)subscribe and
+    on_disconnect whenever the connection drops, since messages published in
+    between are lost. Register before start_pubsub_listener().
+    """
+    _subscriptions[channel] = (on_message, on_connect, on_disconnect)
+
+def _listen():
+    while True:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(*_subscriptions)
+            for _, on_connect, _ in _subscriptions.values():
+                if on_connect:
+                    on_connect()
+            for message in pubsub.listen():
+                _subscriptions[message["channel"]][0](message["data"])
+        except Exception as e:
+            print(f"Pub/sub listener lost Redis, retrying: {e}")
+        finally:
+            for _, _, on_disconnect in _subscriptions.values():
+                if on_disconnect:
+                    on_disconnect()
+            pubsub.close()
+        time.sleep(1)
+
+def start_pubsub_listener():
+    """Start delivering pub/sub messages (and enable the L1 cache); call once per worker at startup"""
+    threading.Thread(target=_listen, name="pubsub-listener", daemon=True).start()
+
+def _enable_local_cache():
+    local_cache.enabled = True
+
+def _reset_local_cache():
+    # Invalidations may be missed while disconnected, so start over cold
+    local_cache.enabled = False
+    local_cache.clear()
+
+subscribe(INVALIDATION_CHANNEL, local_cache.drop_prefix, _enable_local_cache, _reset_local_cache)
+
+def _tasks_version_key(user_id: int) -> str:
+    return f"tasks:{user_id}:version"
+
+def user_tasks_cache_key(redis_client, user_id: int, *parts) -> str:
+    """
+    Build a task cache key scoped to one user. The key embeds the user's cache
+    version, so bumping the version invalidates all of that user's entries at
+    once and leaves the stale ones to expire on their TTL.
+    """
+    version_key = _tasks_version_key(user_id)
+    generation = local_cache.generation
+    version = local_cache.get(version_key)
+    if version is None:
+        version = redis_client.get(version_key) or 0
+        local_cache.set(version_key, version, len(str(version)), generation)
+    return f"tasks:{user_id}:v{version}:" + ":".join(str(part) for part in parts)
+
+def _primary_reads_key(user_id: int) -> str:
+    return f"db:primary:{user_id}"
+
+def invalidate_user_tasks(redis_client, user_id: int):
+    pipe = redis_client.pipeline()
+    pipe.incr(_tasks_version_key(user_id))
+    # The user's reads go to the primary until the replicas have caught up,
+    # whichever worker serves them
+    pipe.set(_primary_reads_key(user_id), 1, px=int(settings.db_replica_sticky_seconds * 1000))
+    pipe.execute()
+    invalidate_prefix(redis_client, f"tasks:{user_id}:")
+
+def reads_need_primary(redis_client, user_id: int) -> bool:
+    """True shortly after the user wrote tasks; pass it as SessionLocal(primary=...)"""
+    try:
+        return bool(redis_client.exists(_primary_reads_key(user_id)))
+    except redis.exceptions.RedisError:
+        # Without Redis we cannot tell, so stay on the safe side
+        return True
+
+
+def _release(lock):
+    try:
+        lock.release()
+    except redis.exceptions.LockError:
+        # The lock timed out and may now belong to someone else
+        pass
+
+def _store(redis_client, key: str, value: Any, ttl: int, soft_ttl: int, compute_time: float) -> str:
+    envelope = {"value": value, "fresh_until": time.time() + soft_ttl, "compute_time": compute_time}
+    raw = json.dumps(envelope)
+    redis_client.setex(key, ttl, raw)
+    return raw
+
+def _recompute(redis_client, key: str, compute: Callable[[], Any], ttl: int, soft_ttl: int, local: bool = False) -> Any:
+    generation = local_cache.generation
+    start = time.perf_counter()
+    value = compute()
+    raw = _store(redis_client, key, value, ttl, soft_ttl, time.perf_counter() - start)
+    if local:
+        local_cache.set(key, value, len(raw), generation)
+    return value
+
+def _refresh_in_background(redis_client, key, compute, ttl, soft_ttl, lock, local):
+    def run():
+        try:
+            _recompute(redis_client, key, compute, ttl, soft_ttl, local)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            _release(lock)
+
+    threading.Thread(target=run, daemon=True).start()
+
+def _should_refresh(envelope: dict, beta: float) -> bool:
+    # Probabilistic early expiration: the closer to fresh_until and the slower the
+    # recompute, the more likely one reader volunteers to refresh ahead of time
+    jitter = envelope["compute_time"] * beta * -math.log(1.0 - random.random())
+    return time.time() + jitter >= envelope["fresh_until"]
+
+def get_or_compute(
+    redis_client,
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int = 60,
+    soft_ttl: Optional[int] = None,
+    lock_timeout: int = 10,
+    wait_timeout: float = 5.0,
+    beta: float = 1.0,
+    local: bool = False,
+) -> Any:
+    """
+    Cache-aside read with stampede protection.
+
+    Values stay in Redis for ttl seconds but are considered fresh only for
+    soft_ttl (default: half of ttl). A stale value is served while one caller,
+    holding a per-key lock, refreshes it in the background. On a cold miss only
+    the lock holder runs compute(); everyone else waits for its result. compute
+    must return JSON-serializable data and must not depend on request-scoped
+    resources such as the request's DB session, since it may run after the
+    request has finished.
+
+    With local=True the value is also kept in this worker's L1 cache, which is
+    checked before Redis. Use it for hot, small keys whose writers go through
+    invalidate_prefix().
+    """
+    generation = local_cache.generation
+    if local:
+        value = local_cache.get(key)
+        cache_stats.incr("l1_hits" if value is not None else "l1_misses")
+        if value is not None:
+            return value
+
+    soft_ttl = soft_ttl if soft_ttl is not None else ttl // 2
+    lock = redis_client.lock(f"lock:{key}", timeout=lock_timeout, thread_local=False)
+
+    cached = redis_client.get(key)
+    cache_stats.incr("l2_hits" if cached is not None else "l2_misses")
+    if cached is not None:
+        envelope = json.loads(cached)
+        if local:
+            local_cache.set(key, envelope["value"], len(cached), generation)
+        if _should_refresh(envelope, beta) and lock.acquire(blocking=False):
+            _refresh_in_background(redis_client, key, compute, ttl, soft_ttl, lock, local)
+        return envelope["value"]
+
+    if lock.acquire(blocking=False):
+        try:
+            # The previous holder may have stored the value between our miss
+            # and its release of the lock
+            cached = redis_client.get(key)
+            if cached is not None:
+                value = json.loads(cached)["value"]
+                if local:
+                    local_cache.set(key, value, len(cached), generation)
+                return value
+            return _recompute(redis_client, key, compute, ttl, soft_ttl, local)
+        finally:
+            _release(lock)
+
+    # Someone else is computing this key; wait for their result
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cached = redis_client.get(key)
+        if cached is not None:
+            return json.loads(cached)["value"]
+
+    # The lock holder is slow or died; compute without caching rather than fail
+    return compute()
@@ -1,10 +1,41 @@
 from celery import Celery
+from kombu import Queue
 from app.config import settings
 
+# Latency-sensitive work stays on "default"; long CPU-bound jobs go to "cpu" so
+# they cannot starve it. Run a dedicated worker per queue with -Q.
+DEFAULT_QUEUE = "default"
+CPU_QUEUE = "cpu"
+
 celery_app = Celery(
     "todo_app",
     broker=settings.redis_url,
-    backend=settings.redis_url
+    backend=settings.redis_url,
+    include=["app.tasks"]
 )
 
-celery_app.conf.update(task_track_started=True) 
\ No newline at end of file
+celery_app.conf.update(
+    task_track_started=True,
+    result_expires=settings.celery_result_expires,
+    task_default_queue=DEFAULT_QUEUE,
+    task_queues=(Queue(DEFAULT_QUEUE), Queue(CPU_QUEUE)),
+    task_routes={
+        "app.tasks.import_tasks_file": {"queue": CPU_QUEUE},
+    },
+    worker_prefetch_multiplier=settings.celery_worker_prefetch_multiplier,
+    worker_concurrency=settings.celery_worker_concurrency or None,
+    beat_schedule={
+        "send-due-reminders": {
+            "task": "app.tasks.send_due_reminders",
+            "schedule": settings.reminder_scan_interval,
+        },
+        "archive-completed-tasks": {
+            "task": "app.tasks.archive_completed_tasks",
+            "schedule": settings.archive_interval,
+        },
+    },
+    task_always_eager=settings.celery_task_always_eager,
+    task_eager_propagates=True,
+    # Keep eager results in the backend too, so job status works in eager mode
+    task_store_eager_result=True,
+)
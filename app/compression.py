@@ -0,0 +1,175 @@
+import gzip
+import zlib
+from typing import Optional
+
+import redis.asyncio as aioredis
+import zstandard
+
+from app.config import settings
+
+# Handlers set this on responses whose body is fully determined by a versioned
+# cache key; the middleware then keeps compressed copies next to the cached
+# JSON. It is stripped before the response leaves the app.
+CACHE_KEY_HEADER = b"x-cache-key"
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/x-ndjson")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("zstd", "gzip"):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.compression_zstd_level).compress(body)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level)
+
+
+class _StreamCompressor:
+    """Incremental compressor; every chunk is flushed so streamed data isn't held back"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=settings.compression_zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses with zstd or gzip, whichever the client
+    prefers, once they reach a minimum size. Streaming responses are compressed
+    chunk by chunk. Responses tagged with a cache key reuse compressed bytes
+    stored in Redis, so a cache hit is never compressed twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.redis = aioredis.from_url(settings.redis_url)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, _strip_cache_key(send))
+        responder = _CompressingResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    async def cached_body(self, cache_key: str, encoding: str) -> Optional[bytes]:
+        try:
+            return await self.redis.get(f"{cache_key}:body:{encoding}")
+        except Exception:
+            return None
+
+    async def store_body(self, cache_key: str, encoding: str, body: bytes):
+        try:
+            await self.redis.set(f"{cache_key}:body:{encoding}", body, ex=settings.compression_cache_ttl)
+        except Exception as e:
+            print(f"Could not cache compressed body: {e}")
+
+
+def _strip_cache_key(send):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message["headers"] = [(k, v) for k, v in message["headers"] if k.lower() != CACHE_KEY_HEADER]
+        await send(message)
+    return wrapped
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, send, encoding: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.start = None
+        self.cache_key = None
+        self.stream = None
+        # "undecided" until the start or first body message, then "identity", "streaming" or "cached"
+        self.mode = "undecided"
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            return await self._on_start(message)
+        if message["type"] != "http.response.body":
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode == "cached":
+            return
+        if self.mode == "identity":
+            return await self._send(message)
+        if self.mode == "streaming":
+            chunk = self.stream.compress(body)
+            if not more_body:
+                chunk += self.stream.finish()
+            return await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        if self.mode == "undecided" and more_body:
+            self.mode = "streaming"
+            self.stream = _StreamCompressor(self.encoding)
+            await self._send_start(compressed=True, length=None)
+            return await self._send({"type": "http.response.body", "body": self.stream.compress(body), "more_body": True})
+
+        # Whole body in one message (the usual JSONResponse)
+        if len(body) < settings.compression_min_size:
+            self.mode = "identity"
+            await self._send_start(compressed=False, length=len(body))
+            return await self._send(message)
+        compressed = compress(body, self.encoding)
+        if self.cache_key:
+            await self.middleware.store_body(self.cache_key, self.encoding, compressed)
+        await self._send_start(compressed=True, length=len(compressed))
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _on_start(self, message):
+        headers = [(k, v) for k, v in message["headers"] if k.lower() != CACHE_KEY_HEADER]
+        cache_key = next((v.decode() for k, v in message["headers"] if k.lower() == CACHE_KEY_HEADER), None)
+        content_type = next((v for k, v in headers if k.lower() == b"content-type"), b"")
+        already_encoded = any(k.lower() == b"content-encoding" for k, _ in headers)
+        self.start = {**message, "headers": headers}
+
+        if already_encoded or not content_type.startswith(COMPRESSIBLE_TYPES) or message["status"] in (204, 304):
+            self.mode = "identity"
+            return await self._send(self.start)
+
+        if cache_key and message["status"] == 200:
+            self.cache_key = cache_key
+            cached = await self.middleware.cached_body(cache_key, self.encoding)
+            if cached is not None:
+                self.mode = "cached"
+                await self._send_start(compressed=True, length=len(cached))
+                await self._send({"type": "http.response.body", "body": cached})
+
+    async def _send_start(self, compressed: bool, length: Optional[int]):
+        headers = [(k, v) for k, v in self.start["headers"] if k.lower() != b"content-length"]
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        if compressed:
+            headers.append((b"content-encoding", self.encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+        await self._send({**self.start, "headers": headers})
@@ -6,14 +6,97 @@ load_dotenv()
 
 class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL")
+    # Comma-separated list of read replica URLs; empty means everything goes to the primary
+    database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    db_pool_size: int = os.getenv("DB_POOL_SIZE", 5)
+    db_max_overflow: int = os.getenv("DB_MAX_OVERFLOW", 10)
+    db_pool_timeout: int = os.getenv("DB_POOL_TIMEOUT", 30)
+    db_pool_recycle: int = os.getenv("DB_POOL_RECYCLE", 1800)
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", True)
+    # How long a user's reads stay on the primary after they write, to cover replica lag
+    db_replica_sticky_seconds: float = os.getenv("DB_REPLICA_STICKY_SECONDS", 5)
+    # python -m app.serve
+    serve_host: str = os.getenv("SERVE_HOST", "0.0.0.0")
+    serve_port: int = os.getenv("SERVE_PORT", 8000)
+    # 0 starts one worker per CPU
+    serve_workers: int = os.getenv("SERVE_WORKERS", 0)
+    # Workers exit after this many requests and are replaced, 0 disables recycling
+    serve_max_requests: int = os.getenv("SERVE_MAX_REQUESTS", 10000)
+    serve_keep_alive: int = os.getenv("SERVE_KEEP_ALIVE", 15)
+    serve_backlog: int = os.getenv("SERVE_BACKLOG", 2048)
+    serve_graceful_timeout: int = os.getenv("SERVE_GRACEFUL_TIMEOUT", 30)
+    # Admission control per route group ("chat" = /api/v1/chatbot, "crud" = the rest of /api/v1)
+    chat_max_concurrency: int = os.getenv("CHAT_MAX_CONCURRENCY", 8)
+    chat_max_queue: int = os.getenv("CHAT_MAX_QUEUE", 16)
+    chat_rate_per_minute: float = os.getenv("CHAT_RATE_PER_MINUTE", 20)
+    chat_burst: int = os.getenv("CHAT_BURST", 5)
+    crud_max_concurrency: int = os.getenv("CRUD_MAX_CONCURRENCY", 64)
+    crud_max_queue: int = os.getenv("CRUD_MAX_QUEUE", 256)
+    crud_rate_per_minute: float = os.getenv("CRUD_RATE_PER_MINUTE", 600)
+    crud_burst: int = os.getenv("CRUD_BURST", 100)
+    # Once this many requests are queued in a worker, chat is shed to keep CRUD moving
+    admission_shed_queue_depth: int = os.getenv("ADMISSION_SHED_QUEUE_DEPTH", 64)
+    chat_batch_max_questions: int = os.getenv("CHAT_BATCH_MAX_QUESTIONS", 10)
+    # Answers generated at once for one batch request
+    chat_batch_concurrency: int = os.getenv("CHAT_BATCH_CONCURRENCY", 4)
+    # Chat memory: turns kept verbatim, and token budgets for the memory in
+    # each prompt and for the running summary of older turns
+    chat_memory_turns: int = os.getenv("CHAT_MEMORY_TURNS", 4)
+    chat_memory_max_tokens: int = os.getenv("CHAT_MEMORY_MAX_TOKENS", 1500)
+    chat_memory_summary_max_tokens: int = os.getenv("CHAT_MEMORY_SUMMARY_MAX_TOKENS", 300)
+    # Conversations kept in memory per worker, and how long an idle one is kept
+    chat_memory_max_conversations: int = os.getenv("CHAT_MEMORY_MAX_CONVERSATIONS", 1000)
+    chat_memory_idle_seconds: float = os.getenv("CHAT_MEMORY_IDLE_SECONDS", 60 * 60)
+    # Threads for blocking chat work (LLM/embedding clients) vs FastAPI's sync CRUD handlers
+    chat_executor_threads: int = os.getenv("CHAT_EXECUTOR_THREADS", 16)
+    crud_threadpool_size: int = os.getenv("CRUD_THREADPOOL_SIZE", 40)
     secret_key: str = os.getenv("SECRET_KEY", "your-super-secret-key")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30)
+    refresh_token_expire_days: int = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14)
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # In-process L1 cache in front of Redis, per worker
+    l1_cache_max_bytes: int = os.getenv("L1_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    l1_cache_ttl: float = os.getenv("L1_CACHE_TTL", 30)
+    # Response compression: bodies below the threshold are sent as-is
+    compression_min_size: int = os.getenv("COMPRESSION_MIN_SIZE", 1024)
+    compression_zstd_level: int = os.getenv("COMPRESSION_ZSTD_LEVEL", 3)
+    compression_gzip_level: int = os.getenv("COMPRESSION_GZIP_LEVEL", 6)
+    # Lifetime of compressed copies of cached responses; keep it at or below the cache TTL
+    compression_cache_ttl: int = os.getenv("COMPRESSION_CACHE_TTL", 60)
     openai_api_key: str
+    # Seconds Celery keeps task results in Redis
+    celery_result_expires: int = os.getenv("CELERY_RESULT_EXPIRES", 24 * 60 * 60)
+    celery_worker_prefetch_multiplier: int = os.getenv("CELERY_WORKER_PREFETCH_MULTIPLIER", 4)
+    # 0 lets Celery use one process per CPU
+    celery_worker_concurrency: int = os.getenv("CELERY_WORKER_CONCURRENCY", 0)
+    # Run tasks inline in the calling process (tests, local dev without a worker)
+    celery_task_always_eager: bool = os.getenv("CELERY_TASK_ALWAYS_EAGER", False)
+    # Due-date reminders, scanned by Celery beat
+    reminder_scan_interval: float = os.getenv("REMINDER_SCAN_INTERVAL", 60)
+    reminder_lead_seconds: int = os.getenv("REMINDER_LEAD_SECONDS", 15 * 60)
+    # Extra look-back per scan to absorb clock skew between workers
+    reminder_scan_overlap_seconds: int = os.getenv("REMINDER_SCAN_OVERLAP_SECONDS", 60)
+    # Overdue tasks that were never reminded are still picked up if due within this window
+    reminder_backfill_seconds: int = os.getenv("REMINDER_BACKFILL_SECONDS", 24 * 60 * 60)
+    reminder_batch_size: int = os.getenv("REMINDER_BATCH_SIZE", 500)
+    reminder_sink: str = os.getenv("REMINDER_SINK", "app.reminders.LogSink")
+    # Uploads above this size are imported by a Celery worker instead of inline
+    task_import_inline_max_bytes: int = os.getenv("TASK_IMPORT_INLINE_MAX_BYTES", 5 * 1024 * 1024)
+    task_import_chunk_size: int = os.getenv("TASK_IMPORT_CHUNK_SIZE", 5000)
+    # Must be shared between the web and worker containers
+    task_import_dir: str = os.getenv("TASK_IMPORT_DIR", "/tmp/task_imports")
+    # Completed tasks older than this move to tasks_archive, in batches, by Celery beat
+    archive_after_days: int = os.getenv("ARCHIVE_AFTER_DAYS", 90)
+    archive_batch_size: int = os.getenv("ARCHIVE_BATCH_SIZE", 1000)
+    archive_interval: float = os.getenv("ARCHIVE_INTERVAL", 60 * 60)
 
     class Config:
         env_file = ".env"
         extra = "allow"
 
+    @property
+    def replica_urls(self) -> list:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
 settings = Settings()
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.cache import get_or_compute, reads_need_primary, user_tasks_cache_key
+from app.models.tasks import ArchivedTask, Task
+
+PERIODS = {"day": "D", "week": "W-MON"}
+DUE_SOON_WINDOW = timedelta(days=7)
+
+def _load_window(db: Session, owner_id: int, since: datetime) -> pd.DataFrame:
+    # Columnar fetch of the two timestamp columns the trend and lead times use,
+    # for tasks created or completed inside the window only; no ORM objects are
+    # built. Archived tasks were created before they were completed, so their
+    # completed_at alone decides.
+    rows = (
+        db.query(Task.created_at, Task.completed_at)
+        .filter(Task.owner_id == owner_id, or_(Task.created_at >= since, Task.completed_at >= since))
+        .all()
+    )
+    rows += (
+        db.query(ArchivedTask.created_at, ArchivedTask.completed_at)
+        .filter(ArchivedTask.owner_id == owner_id, ArchivedTask.completed_at >= since)
+        .all()
+    )
+    frame = pd.DataFrame.from_records(rows, columns=["created_at", "completed_at"])
+    for column in ("created_at", "completed_at"):
+        frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+def _counts(db: Session, owner_id: int, now: datetime) -> dict:
+    """Totals over the whole history and deadline counts, aggregated in SQL"""
+    # A task whose completed flag is unset counts as pending
+    pending = Task.completed.isnot(True)
+    hot = (
+        db.query(
+            func.count(Task.id),
+            func.count(Task.id).filter(Task.completed.is_(True)),
+            func.count(Task.id).filter(pending, Task.due_at < now),
+            func.count(Task.id).filter(pending, Task.due_at >= now, Task.due_at < now + DUE_SOON_WINDOW),
+        )
+        .filter(Task.owner_id == owner_id)
+        .one()
+    )
+    # Archived tasks are all completed
+    archived = db.query(func.count(ArchivedTask.id)).filter(ArchivedTask.owner_id == owner_id).scalar()
+    return {
+        "total": hot[0] + archived,
+        "completed": hot[1] + archived,
+        "overdue": hot[2],
+        "due_soon": hot[3],
+    }
+
+def _next_due(db: Session, owner_id: int, now: datetime, limit: int = 5) -> list:
+    """Earliest pending deadlines, overdue first, read in (owner_id, due_at) index order"""
+    return (
+        db.query(Task.id, Task.title, Task.due_at)
+        .filter(Task.owner_id == owner_id, Task.completed.isnot(True), Task.due_at < now + DUE_SOON_WINDOW)
+        .order_by(Task.due_at)
+        .limit(limit)
+        .all()
+    )
+
+def _percentile(values: np.ndarray, q: float):
+    return round(float(np.percentile(values, q)), 2) if values.size else None
+
+def get_task_analytics(db: Session, owner_id: int, period: str = "day", days: int = 30) -> dict:
+    """Completion trend, throughput, overdue counts and lead times for one user's tasks"""
+    now = datetime.utcnow()
+    since = now - timedelta(days=days)
+    frame = _load_window(db, owner_id, since)
+    counts = _counts(db, owner_id, now)
+    since = pd.Timestamp(since)
+
+    # Per-period counts of created and completed tasks within the window
+    freq = PERIODS[period]
+    created = frame.loc[frame["created_at"] >= since, "created_at"].dt.to_period(freq).value_counts()
+    finished = frame.loc[frame["completed_at"] >= since, "completed_at"].dt.to_period(freq).value_counts()
+    trend = pd.DataFrame({"created": created, "completed": finished}).fillna(0).astype(int).sort_index()
+
+    # Lead times of the tasks completed within the window
+    in_window = frame["completed_at"] >= since
+    lead_hours = (
+        (frame.loc[in_window, "completed_at"] - frame.loc[in_window, "created_at"]).dt.total_seconds().to_numpy() / 3600
+    )
+
+    total, completed = counts["total"], counts["completed"]
+    return {
+        "period": period,
+        "days": days,
+        "total_tasks": total,
+        "completed_tasks": completed,
+        "pending_tasks": total - completed,
+        "completion_rate": round(completed / total * 100, 2) if total else 0.0,
+        "overdue_tasks": counts["overdue"],
+        "due_soon_tasks": counts["due_soon"],
+        "lead_time_hours": {
+            "mean": round(float(lead_hours.mean()), 2) if lead_hours.size else None,
+            "median": _percentile(lead_hours, 50),
+            "p90": _percentile(lead_hours, 90),
+        },
+        "trend": [
+            {"period": str(index.start_time.date()), "created": int(row.created), "completed": int(row.completed)}
+            for index, row in trend.iterrows()
+        ],
+        "next_due": [
+            {"id": row.id, "title": row.title, "due_at": row.due_at.isoformat()}
+            for row in _next_due(db, owner_id, now)
+        ],
+    }
+
+def get_cached_task_analytics(redis_client, session_factory, owner_id: int, period: str = "day", days: int = 30) -> dict:
+    """Analytics through the per-user task cache, so any task write invalidates it"""
+    def compute():
+        with session_factory(primary=reads_need_primary(redis_client, owner_id)) as db:
+            return get_task_analytics(db, owner_id=owner_id, period=period, days=days)
+
+    cache_key = user_tasks_cache_key(redis_client, owner_id, "analytics", period, days)
+    return get_or_compute(redis_client, cache_key, compute, ttl=300, local=True)
@@ -1,32 +1,277 @@
+import csv
+import io
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, not_, select, union_all
 from sqlalchemy.orm import Session
-from app.models.tasks import Task
+from app.models.tasks import ArchivedTask, Task
 from app.schemas.tasks import TaskCreate, TaskUpdate
 
-def get_task(db: Session, task_id: int):
-    return db.query(Task).filter(Task.id == task_id).first()
+# Sort keys accepted by get_tasks; each one is backed by an (owner_id, [completed,] column, id) index.
+# Ties are broken by id in the same direction, so offset pages never overlap or skip rows.
+TASK_SORTS = {
+    "id": (Task.id.asc(),),
+    "-id": (Task.id.desc(),),
+    "title": (Task.title.asc(), Task.id.asc()),
+    "-title": (Task.title.desc(), Task.id.desc()),
+}
+TASK_FIELDS = ("id", "title", "description", "completed", "created_at", "completed_at", "due_at")
+# Columns copied into tasks_archive; reminded_at only matters for pending tasks
+ARCHIVED_COLUMNS = ("id", "owner_id", "title", "description", "completed", "created_at", "completed_at", "due_at")
+
+def get_task(db: Session, task_id: int, owner_id: int, include_archived: bool = False):
+    db_task = db.query(Task).filter(Task.id == task_id, Task.owner_id == owner_id).first()
+    if db_task is None and include_archived:
+        db_task = db.query(ArchivedTask).filter(ArchivedTask.id == task_id, ArchivedTask.owner_id == owner_id).first()
+    return db_task
+
+def _filtered_tasks(query, owner_id: int, completed: Optional[bool], title_prefix: Optional[str], model=Task):
+    query = query.filter(model.owner_id == owner_id)
+    if completed is not None:
+        query = query.filter(model.completed == completed)
+    if title_prefix:
+        query = query.filter(model.title.startswith(title_prefix, autoescape=True))
+    return query
+
+def _order_by(columns, sort: str) -> list:
+    """TASK_SORTS ordering over any column collection: a model or a subquery's columns"""
+    field = sort.lstrip("-")
+    keys = (field,) if field == "id" else (field, "id")
+    return [getattr(columns, key).desc() if sort.startswith("-") else getattr(columns, key).asc() for key in keys]
+
+def _with_archived_rows(
+    db: Session,
+    fields: List[str],
+    owner_id: int,
+    skip: int,
+    limit: int,
+    completed: Optional[bool],
+    title_prefix: Optional[str],
+    sort: str,
+):
+    """
+    One page over hot and archived tasks together. Each table contributes at
+    most skip + limit rows, read in index order, before the two are merged.
+    """
+    # The sort columns are selected too, so the merged rows can be ordered by them
+    selected = list(dict.fromkeys([*fields, sort.lstrip("-"), "id"]))
+    parts = [
+        _filtered_tasks(select(*(getattr(model, field) for field in selected)), owner_id, completed, title_prefix, model)
+        .order_by(*_order_by(model, sort))
+        .limit(skip + limit)
+        .subquery()
+        for model in (Task, ArchivedTask)
+    ]
+    combined = union_all(*(select(part) for part in parts)).subquery()
+    query = (
+        select(*(combined.c[field] for field in fields))
+        .order_by(*_order_by(combined.c, sort))
+        .offset(skip)
+        .limit(limit)
+    )
+    return db.execute(query).all()
+
+def get_tasks(
+    db: Session,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    sort: str = "id",
+    include_archived: bool = False,
+):
+    """Tasks as ORM objects; with include_archived, rows with the same attributes"""
+    if include_archived:
+        return _with_archived_rows(db, list(TASK_FIELDS), owner_id, skip, limit, completed, title_prefix, sort)
+    query = _filtered_tasks(db.query(Task), owner_id, completed, title_prefix)
+    return query.order_by(*TASK_SORTS[sort]).offset(skip).limit(limit).all()
+
+def get_task_fields(
+    db: Session,
+    owner_id: int,
+    fields: List[str],
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    sort: str = "id",
+    include_archived: bool = False,
+) -> List[dict]:
+    """Like get_tasks, but selects only the requested columns and returns plain dicts"""
+    if include_archived:
+        rows = _with_archived_rows(db, fields, owner_id, skip, limit, completed, title_prefix, sort)
+    else:
+        columns = [getattr(Task, field) for field in fields]
+        query = _filtered_tasks(db.query(*columns), owner_id, completed, title_prefix)
+        rows = query.order_by(*TASK_SORTS[sort]).offset(skip).limit(limit).all()
+    return [dict(row._mapping) for row in rows]
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Task).offset(skip).limit(limit).all()
+def count_tasks(db: Session, owner_id: int, completed: Optional[bool] = None, include_archived: bool = False) -> int:
+    total = _filtered_tasks(db.query(func.count(Task.id)), owner_id, completed, None).scalar()
+    # Archived tasks are all completed, so they are counted off the owner index alone
+    if include_archived and completed is not False:
+        total += db.query(func.count(ArchivedTask.id)).filter(ArchivedTask.owner_id == owner_id).scalar()
+    return total
 
-def create_task(db: Session, task: TaskCreate):
-    db_task = Task(title=task.title, description=task.description)
+def create_task(db: Session, task: TaskCreate, owner_id: int):
+    db_task = Task(
+        title=task.title,
+        description=task.description,
+        due_at=task.due_at,
+        owner_id=owner_id,
+        created_at=datetime.utcnow(),
+    )
     db.add(db_task)
     db.commit()
     db.refresh(db_task)
     return db_task
 
-def update_task(db: Session, task_id: int, task: TaskUpdate):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+def update_task(db: Session, task_id: int, task: TaskUpdate, owner_id: int):
+    db_task = get_task(db, task_id=task_id, owner_id=owner_id)
     if db_task:
+        was_completed = db_task.completed
+        previous_due_at = db_task.due_at
         for key, value in task.model_dump(exclude_unset=True).items():
             setattr(db_task, key, value)
+        if db_task.due_at != previous_due_at:
+            db_task.reminded_at = None
+        if db_task.completed and not was_completed:
+            db_task.completed_at = datetime.utcnow()
+        elif not db_task.completed:
+            db_task.completed_at = None
         db.commit()
         db.refresh(db_task)
     return db_task
 
-def delete_task(db: Session, task_id: int):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+def delete_task(db: Session, task_id: int, owner_id: int, include_archived: bool = False):
+    db_task = get_task(db, task_id=task_id, owner_id=owner_id, include_archived=include_archived)
     if db_task:
         db.delete(db_task)
         db.commit()
     return db_task
+
+def claim_due_tasks(db: Session, since: datetime, until: datetime, limit: int, claimed_at: datetime) -> List[dict]:
+    """
+    Claim up to limit pending tasks due in (since, until] that have not been
+    reminded yet. SKIP LOCKED lets concurrent scanners take disjoint batches.
+    The caller commits to release the row locks.
+    """
+    rows = (
+        db.query(Task.id, Task.owner_id, Task.title, Task.due_at)
+        .filter(
+            not_(Task.completed),
+            Task.due_at > since,
+            Task.due_at <= until,
+            Task.reminded_at.is_(None),
+        )
+        .order_by(Task.due_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Task)
+        .all()
+    )
+    if rows:
+        db.query(Task).filter(Task.id.in_([row.id for row in rows])).update(
+            {Task.reminded_at: claimed_at}, synchronize_session=False
+        )
+    return [dict(row._mapping) for row in rows]
+
+def archive_completed_tasks(db: Session, completed_before: datetime, limit: int) -> List[dict]:
+    """
+    Move up to limit tasks completed before the cutoff into tasks_archive and
+    return their ids and owners. Rows are claimed with SKIP LOCKED, so several
+    archivers can run at once. The caller commits.
+    """
+    rows = (
+        db.query(Task.id, Task.owner_id)
+        .filter(Task.completed, Task.completed_at < completed_before)
+        .order_by(Task.completed_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Task)
+        .all()
+    )
+    if rows:
+        ids = [row.id for row in rows]
+        db.execute(
+            insert(ArchivedTask).from_select(
+                ARCHIVED_COLUMNS,
+                select(*(getattr(Task, column) for column in ARCHIVED_COLUMNS)).where(Task.id.in_(ids)),
+            )
+        )
+        db.execute(delete(Task).where(Task.id.in_(ids)))
+    return [dict(row._mapping) for row in rows]
+
+def _copy_chunk(dbapi_connection, owner_id: int, rows: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    now = datetime.utcnow().isoformat()
+    for title, description, completed, due_at in rows:
+        # An unquoted empty field is NULL in COPY's CSV format
+        writer.writerow((
+            owner_id,
+            title,
+            description,
+            "t" if completed else "f",
+            # Explicit UTC like every other write path; the column default is server-local now()
+            now,
+            now if completed else None,
+            due_at.isoformat() if due_at else None,
+        ))
+    buffer.seek(0)
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY tasks (owner_id, title, description, completed, created_at, completed_at, due_at) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+def bulk_import_tasks(
+    db: Session,
+    owner_id: int,
+    rows: Iterable,
+    chunk_size: int = 5000,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    Load parsed rows in chunks within a single transaction. Postgres goes through
+    COPY FROM STDIN; other databases use executemany. Only one chunk is held in
+    memory at a time. None rows are counted as skipped.
+    """
+    connection = db.connection(bind_arguments={"clause": insert(Task)})
+    use_copy = connection.dialect.name == "postgresql"
+    imported = skipped = 0
+    iterator = iter(rows)
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        valid = [row for row in chunk if row is not None]
+        skipped += len(chunk) - len(valid)
+        if valid:
+            if use_copy:
+                _copy_chunk(connection.connection.dbapi_connection, owner_id, valid)
+            else:
+                now = datetime.utcnow()
+                connection.execute(
+                    insert(Task),
+                    [
+                        {
+                            "owner_id": owner_id,
+                            "title": title,
+                            "description": description,
+                            "completed": completed,
+                            "created_at": now,
+                            "completed_at": now if completed else None,
+                            "due_at": due_at,
+                        }
+                        for title, description, completed, due_at in valid
+                    ],
+                )
+            imported += len(valid)
+        if on_progress:
+            on_progress(imported, skipped)
+
+    db.commit()
+    return {"imported": imported, "skipped": skipped}
@@ -1,18 +1,140 @@
+import random
+import threading
+import time
+
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Delete, Insert, Update
 from app.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class PoolMetrics:
+    """Tracks how long requests wait to check a connection out of the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records the checkout wait time for every connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record(time.perf_counter() - start)
+
+
+def _create_engine(url: str):
+    # SQLite (tests, local dev) manages its own pool and rejects the sizing arguments
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+replica_engines = [_create_engine(url) for url in settings.replica_urls]
+
+
+class RoutingSession(Session):
+    """
+    Sends writes, flushes and locking reads to the primary and plain reads to a
+    replica. A session opened with primary=True, or one that has written, reads
+    from the primary too until it is closed, so refreshes after a commit see
+    the write. Read-your-writes across requests is decided by the caller, per
+    user (see app.cache.reads_need_primary).
+    """
+
+    def __init__(self, *args, primary: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._primary = primary
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not replica_engines or self._use_primary(clause):
+            return engine
+        return random.choice(replica_engines)
+
+    def _use_primary(self, clause) -> bool:
+        if self._primary:
+            return True
+        if self._flushing or self._wrote:
+            self._wrote = True
+            return True
+        if isinstance(clause, (Insert, Update, Delete)):
+            self._wrote = True
+            return True
+        return getattr(clause, "_for_update_arg", None) is not None
+
+    def close(self):
+        self._wrote = False
+        super().close()
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request):
+    # Anything but a read may read-modify-write, so it never sees a lagging replica
+    db = SessionLocal(primary=request.method not in ("GET", "HEAD"))
     try:
         yield db
     finally:
         db.close()
+
+def init_pools():
+    """Open a first connection to the primary and each replica so the first request doesn't pay for it"""
+    for bind in [engine, *replica_engines]:
+        try:
+            with bind.connect():
+                pass
+        except Exception as e:
+            print(f"Could not pre-connect to {bind.url.render_as_string(hide_password=True)}: {e}")
+
+def dispose_pools():
+    for bind in [engine, *replica_engines]:
+        bind.dispose()
+
+def get_pool_stats() -> dict:
+    """Pool state and checkout wait times for the primary and every replica"""
+    return {
+        "checkout_wait": pool_metrics.snapshot(),
+        "primary": engine.pool.status(),
+        "replicas": [replica.pool.status() for replica in replica_engines],
+    }
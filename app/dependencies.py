@@ -1,22 +1,36 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 
+from app.admission import TOKEN_CLAIMS_STATE
 from app.auth import verify_token
+from app.cache import get_or_compute, get_redis
 from app.crud import users as crud_users
-from app.database import get_db
+from app.database import SessionLocal
 from app.models.users import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _load_principal(username: str):
+    with SessionLocal() as db:
+        user = crud_users.get_user_by_username(db, username=username)
+        return {"id": user.id, "username": user.username} if user else None
+
+# Sync on purpose: the principal lookup may block on Redis or on another
+# worker's fill lock, so FastAPI runs it in the threadpool, off the event loop
+def get_current_user(token: str = Depends(oauth2_scheme), request: Request = None):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    username = verify_token(token, credentials_exception)
-    user = crud_users.get_user_by_username(db, username=username)
-    if user is None:
+    # Admission control has already decoded this request's token
+    claims = getattr(request.state, TOKEN_CLAIMS_STATE, None) if request is not None else None
+    username = verify_token(token, credentials_exception, claims=claims)
+    # Every authenticated request needs the principal, so it is served from L1 when possible
+    principal = get_or_compute(
+        get_redis(), f"user:{username}", lambda: _load_principal(username), ttl=300, local=True
+    )
+    if principal is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    # Detached instance carrying only what handlers use; never add it to a session
+    return User(**principal) 
\ No newline at end of file
@@ -0,0 +1,75 @@
+from typing import Iterable, Optional
+
+from celery import chord, group
+from celery.result import AsyncResult, GroupResult
+
+from app.cache import get_redis
+from app.celery_app import celery_app
+from app.config import settings
+
+# Job records live as long as Celery keeps the result they point to
+JOB_KIND_TASK = "task"
+JOB_KIND_GROUP = "group"
+
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def _register(job_id: str, owner_id: int, kind: str):
+    pipe = get_redis().pipeline()
+    pipe.hset(_job_key(job_id), mapping={"owner_id": owner_id, "kind": kind})
+    pipe.expire(_job_key(job_id), settings.celery_result_expires)
+    pipe.execute()
+
+def submit_job(task, *args, owner_id: int, **kwargs) -> str:
+    """Dispatch a Celery task on its routed queue and record who owns it"""
+    result = task.apply_async(args=args, kwargs=kwargs)
+    _register(result.id, owner_id, JOB_KIND_TASK)
+    return result.id
+
+def submit_group(signatures: Iterable, owner_id: int) -> str:
+    """Run signatures in parallel and track them as one job"""
+    result = group(signatures).apply_async()
+    result.save()
+    _register(result.id, owner_id, JOB_KIND_GROUP)
+    return result.id
+
+def submit_chord(signatures: Iterable, callback, owner_id: int) -> str:
+    """Run signatures in parallel, then the callback on their results; the job is the callback"""
+    result = chord(signatures)(callback)
+    _register(result.id, owner_id, JOB_KIND_TASK)
+    return result.id
+
+def _task_status(result: AsyncResult) -> dict:
+    status = {"state": result.state}
+    if result.state == "PROGRESS":
+        status["progress"] = result.info
+    elif result.successful():
+        status["result"] = result.result
+    elif result.failed():
+        status["error"] = str(result.result)
+    return status
+
+def _group_status(result: Optional[GroupResult]) -> dict:
+    if result is None:
+        return {"state": "PENDING"}
+    total = len(result.results)
+    completed = result.completed_count()
+    if result.failed():
+        state = "FAILURE"
+    elif completed == total:
+        state = "SUCCESS"
+    else:
+        state = "STARTED"
+    return {"state": state, "progress": {"completed": completed, "total": total}}
+
+def get_job_status(job_id: str, owner_id: int) -> Optional[dict]:
+    """Return a job's state and progress, or None if the job is unknown or not the caller's"""
+    record = get_redis().hgetall(_job_key(job_id))
+    if not record or int(record["owner_id"]) != owner_id:
+        return None
+    if record["kind"] == JOB_KIND_GROUP:
+        status = _group_status(GroupResult.restore(job_id, app=celery_app))
+    else:
+        status = _task_status(AsyncResult(job_id, app=celery_app))
+    return {"job_id": job_id, **status}
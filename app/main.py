@@ -1,15 +1,29 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
-from app.routers import tasks, auth, chatbot  # Add chatbot import
+from app.routers import tasks, auth, chatbot, jobs  # Add chatbot import
+from app.database import dispose_pools, get_pool_stats, init_pools
+from app.cache import get_cache_stats, get_redis, redis_pool, start_pubsub_listener
+from app.admission import AdmissionControlMiddleware, configure_executors, get_admission_stats
+from app.compression import CompressionMiddleware
+from app.config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup; runs once in every worker process, so each one gets its own pools
     print("Starting up FastAPI application...")
+    init_pools()
+    try:
+        get_redis().ping()
+    except Exception as e:
+        print(f"Could not connect to Redis: {e}")
+    start_pubsub_listener()
+    configure_executors()
     yield
     # Shutdown
     print("Shutting down FastAPI application...")
+    dispose_pools()
+    redis_pool.disconnect()
 
 app = FastAPI(
     title="ToDo API",
@@ -18,10 +32,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control is added last so it runs first and rejects before any work
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
+
 # Include routers
 app.include_router(tasks.router, prefix="/api/v1", tags=["tasks"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(chatbot.router, prefix="/api/v1/chatbot", tags=["chatbot"])  # Add this line
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 
 @app.get("/")
 async def root():
@@ -33,4 +52,12 @@ async def root():
             "User authentication",
             "Chatbot interface"  # Add this feature
         ]
-    }
\ No newline at end of file
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "db_pool": get_pool_stats(),
+        "cache": get_cache_stats(),
+        "admission": get_admission_stats()
+    }
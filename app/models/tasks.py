@@ -1,10 +1,76 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, func, text
 from app.database import Base
 
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
-    description = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    title = Column(String)
+    # Free text; never filtered or sorted on, so deliberately not indexed
+    description = Column(String)
     completed = Column(Boolean, default=False)
+    # Server-side default so COPY-based imports get it too
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    completed_at = Column(DateTime, nullable=True)
+    due_at = Column(DateTime, nullable=True)
+    # Set when the reminder scheduler claims the task; cleared when due_at changes
+    reminded_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Every read is scoped to one owner, so the owner leads each index
+        Index("ix_tasks_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_owner_completed_id", "owner_id", "completed", "id"),
+        # id breaks ties between equal titles, matching the title sorts
+        Index("ix_tasks_owner_title_id", "owner_id", "title", "id"),
+        Index("ix_tasks_owner_completed_title_id", "owner_id", "completed", "title", "id"),
+        # LIKE 'prefix%' can only use a btree under a non-C collation with pattern ops
+        Index("ix_tasks_owner_title_pattern", "owner_id", "title", postgresql_ops={"title": "text_pattern_ops"}),
+        Index("ix_tasks_owner_created_at", "owner_id", "created_at"),
+        Index("ix_tasks_owner_completed_at", "owner_id", "completed_at"),
+        Index("ix_tasks_owner_due_at", "owner_id", "due_at"),
+        # Reminder scans range over unreminded pending deadlines across all
+        # users; claimed rows leave the index, so a rescan never revisits them.
+        # SQLite only matches a partial index on the predicate's exact form,
+        # and SQLAlchemy renders "not completed" there as "completed = 0".
+        Index(
+            "ix_tasks_due_at_unreminded",
+            "due_at",
+            postgresql_where=text("NOT completed AND reminded_at IS NULL"),
+            sqlite_where=text("completed = 0 AND reminded_at IS NULL"),
+        ),
+        # The archiver ranges over old completed tasks across all users
+        Index(
+            "ix_tasks_completed_at_done",
+            "completed_at",
+            postgresql_where=text("completed"),
+            sqlite_where=text("completed"),
+        ),
+    )
+
+
+class ArchivedTask(Base):
+    """
+    Completed tasks moved out of the hot tasks table. Rows keep their task id
+    and columns, so reads can combine both tables; they are only read when a
+    caller asks for archived tasks.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    title = Column(String)
+    description = Column(String)
+    completed = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    due_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tasks_archive_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_archive_owner_title_id", "owner_id", "title", "id"),
+        Index("ix_tasks_archive_owner_title_pattern", "owner_id", "title", postgresql_ops={"title": "text_pattern_ops"}),
+        # Analytics reads only the archived tasks completed inside its window
+        Index("ix_tasks_archive_owner_completed_at", "owner_id", "completed_at"),
+    )
@@ -0,0 +1,93 @@
+import importlib
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from app.cache import get_redis
+from app.config import settings
+from app.crud import tasks as crud_tasks
+from app.database import SessionLocal
+
+# Upper bound of the last completed scan; the next scan starts from here
+WATERMARK_KEY = "reminders:watermark"
+
+
+class NotificationSink(ABC):
+    """Delivers a batch of reminders; subclass and point REMINDER_SINK at it"""
+
+    @abstractmethod
+    def send(self, reminders: List[Dict]):
+        ...
+
+
+class LogSink(NotificationSink):
+    def send(self, reminders: List[Dict]):
+        for reminder in reminders:
+            print(f"Reminder for user {reminder['owner_id']}: '{reminder['title']}' is due at {reminder['due_at']}")
+
+
+class RedisPubSubSink(NotificationSink):
+    """Publishes each reminder on reminders:{owner_id} for connected clients"""
+
+    def send(self, reminders: List[Dict]):
+        pipe = get_redis().pipeline()
+        for reminder in reminders:
+            payload = {**reminder, "due_at": reminder["due_at"].isoformat()}
+            pipe.publish(f"reminders:{reminder['owner_id']}", json.dumps(payload))
+        pipe.execute()
+
+
+def load_sink(path: str = None) -> NotificationSink:
+    module_name, class_name = (path or settings.reminder_sink).rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def scan_due_tasks(sink: NotificationSink = None) -> int:
+    """
+    Claim and notify tasks whose deadline falls within the reminder lead time.
+
+    Only deadlines after the previous run's horizon (the watermark) are new,
+    except for tasks created or rescheduled since then with a deadline inside
+    the lead time, so the scan starts one lead time plus a small overlap before
+    the watermark. Tasks that were already overdue when they were created or
+    rescheduled fall before that window; a catch-up pass claims the unreminded
+    ones due within the last REMINDER_BACKFILL_SECONDS. The same bound applies
+    to the first run. The partial index holds only pending tasks that have not
+    been reminded, so both passes are short range scans over unclaimed rows.
+    Tasks are claimed in batches, so several workers can run this at once
+    without notifying the same task twice. Notifications go out after the
+    claim commits: delivery is at most once.
+    """
+    sink = sink or load_sink()
+    redis_client = get_redis()
+    now = datetime.utcnow()
+    horizon = now + timedelta(seconds=settings.reminder_lead_seconds)
+
+    backfill_since = now - timedelta(seconds=settings.reminder_backfill_seconds)
+
+    stored = redis_client.get(WATERMARK_KEY)
+    if stored:
+        watermark = datetime.fromisoformat(stored)
+        since = watermark - timedelta(seconds=settings.reminder_lead_seconds + settings.reminder_scan_overlap_seconds)
+        ranges = [(since, horizon), (backfill_since, since)] if since > backfill_since else [(backfill_since, horizon)]
+    else:
+        ranges = [(backfill_since, horizon)]
+
+    sent = 0
+    for range_since, range_until in ranges:
+        while True:
+            with SessionLocal() as db:
+                batch = crud_tasks.claim_due_tasks(
+                    db, since=range_since, until=range_until, limit=settings.reminder_batch_size, claimed_at=now
+                )
+                db.commit()
+            if not batch:
+                break
+            sink.send(batch)
+            sent += len(batch)
+
+    # Overlapping runs may move the watermark back slightly; the overlap and
+    # reminded_at make that harmless
+    redis_client.set(WATERMARK_KEY, horizon.isoformat())
+    return sent
@@ -4,11 +4,9 @@ from typing import List
 
 from app.crud import tasks as crud_tasks
 from app.schemas import tasks as schemas_tasks
-from app.database import SessionLocal, engine
-from app.models import tasks as models_tasks
-
-# Create database tables
-models_tasks.Base.metadata.create_all(bind=engine)
+from app.database import SessionLocal
+from app.dependencies import get_current_user
+from app.models.users import User
 
 router = APIRouter()
 
@@ -21,31 +19,31 @@ def get_db():
         db.close()
 
 @router.post("/tasks/", response_model=schemas_tasks.Task)
-def create_task(task: schemas_tasks.TaskCreate, db: Session = Depends(get_db)):
-    return crud_tasks.create_task(db=db, task=task)
+def create_task(task: schemas_tasks.TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return crud_tasks.create_task(db=db, task=task, owner_id=current_user.id)
 
 @router.get("/tasks/", response_model=List[schemas_tasks.Task])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tasks = crud_tasks.get_tasks(db, skip=skip, limit=limit)
+def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    tasks = crud_tasks.get_tasks(db, owner_id=current_user.id, skip=skip, limit=limit)
     return tasks
 
 @router.get("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def read_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = crud_tasks.get_task(db, task_id=task_id)
+def read_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    db_task = crud_tasks.get_task(db, task_id=task_id, owner_id=current_user.id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @router.put("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def update_task(task_id: int, task: schemas_tasks.TaskUpdate, db: Session = Depends(get_db)):
-    db_task = crud_tasks.update_task(db, task_id=task_id, task=task)
+def update_task(task_id: int, task: schemas_tasks.TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    db_task = crud_tasks.update_task(db, task_id=task_id, task=task, owner_id=current_user.id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @router.delete("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = crud_tasks.delete_task(db, task_id=task_id)
+def delete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    db_task = crud_tasks.delete_task(db, task_id=task_id, owner_id=current_user.id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
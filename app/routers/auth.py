@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -8,7 +9,8 @@ from app import auth
 from app.config import settings
 from app.crud import users as crud_users
 from app.database import get_db
-from app.models.users import Token, UserCreate, UserInDB, UserResponse
+from app.dependencies import get_current_user, oauth2_scheme
+from app.models.users import LogoutRequest, RefreshRequest, Token, User, UserCreate, UserInDB, UserResponse
 
 router = APIRouter()
 
@@ -36,7 +38,34 @@ def login_for_access_token(
     access_token = auth.create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = auth.create_refresh_token(user.username)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(request: RefreshRequest):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    username, refresh_token = auth.rotate_refresh_token(request.refresh_token, credentials_exception)
+    access_token = auth.create_access_token(
+        data={"sub": username}, expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout")
+def logout(
+    request: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+):
+    auth.revoke_access_token(token)
+    if request and request.refresh_token:
+        auth.revoke_refresh_family(request.refresh_token)
+    return {"message": "Logged out"}
 
 
 @router.post("/register", response_model=UserResponse)
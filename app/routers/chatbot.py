@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+from datetime import datetime
 import uuid
 
 from app.dependencies import get_current_user
 from app.models.users import User
 from app.agents.multi_agent_system import multi_agent_system
+from app.config import settings
 
 router = APIRouter()
 
@@ -18,6 +21,20 @@ class ChatResponse(BaseModel):
     conversation_id: str
     timestamp: str
 
+class BatchChatRequest(BaseModel):
+    messages: List[str] = Field(..., min_length=1, max_length=settings.chat_batch_max_questions)
+    conversation_id: Optional[str] = None
+
+class BatchChatAnswer(BaseModel):
+    message: str
+    status: str
+    response: str
+
+class BatchChatResponse(BaseModel):
+    answers: List[BatchChatAnswer]
+    conversation_id: str
+    timestamp: str
+
 class ConversationHistory(BaseModel):
     conversation_id: str
     messages: List[Dict[str, Any]]
@@ -43,10 +60,10 @@ async def chat_with_bot(
         # Process the user query through the multi-agent system
         response = await multi_agent_system.process_user_query(
             user_query=request.message,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            user_id=current_user.id
         )
         
-        from datetime import datetime
         return ChatResponse(
             response=response,
             conversation_id=conversation_id,
@@ -59,6 +76,40 @@ async def chat_with_bot(
             detail=f"Error processing chat request: {str(e)}"
         )
 
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_with_bot(
+    request: BatchChatRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Answer several questions at once; task data is retrieved a single time and
+    the answers are generated concurrently
+    """
+    try:
+        conversation_id = request.conversation_id or f"conv_{current_user.id}_{uuid.uuid4().hex[:8]}"
+        
+        answers = await multi_agent_system.process_user_queries(
+            user_queries=request.messages,
+            conversation_id=conversation_id,
+            user_id=current_user.id,
+            max_concurrency=settings.chat_batch_concurrency
+        )
+        
+        return BatchChatResponse(
+            answers=[
+                BatchChatAnswer(message=answer["query"], status=answer["status"], response=answer["response"])
+                for answer in answers
+            ],
+            conversation_id=conversation_id,
+            timestamp=datetime.utcnow().isoformat()
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing batch chat request: {str(e)}"
+        )
+
 @router.get("/chat/history/{conversation_id}", response_model=ConversationHistory)
 async def get_conversation_history(
     conversation_id: str,
@@ -66,24 +117,26 @@ async def get_conversation_history(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get conversation history for a specific conversation
+    Get conversation history for one of the current user's conversations
     """
     try:
         messages = multi_agent_system.get_conversation_history(
             conversation_id=conversation_id,
+            user_id=current_user.id,
             limit=limit
         )
-        
-        return ConversationHistory(
-            conversation_id=conversation_id,
-            messages=messages
-        )
-    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving conversation history: {str(e)}"
         )
+    
+    if messages is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    return ConversationHistory(
+        conversation_id=conversation_id,
+        messages=messages
+    )
 
 @router.delete("/chat/history/{conversation_id}")
 async def reset_conversation(
@@ -91,17 +144,19 @@ async def reset_conversation(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Reset/clear a specific conversation
+    Reset/clear one of the current user's conversations
     """
     try:
-        await multi_agent_system.reset_conversation(conversation_id)
-        return {"message": f"Conversation {conversation_id} has been reset"}
-    
+        found = await multi_agent_system.reset_conversation(conversation_id, user_id=current_user.id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error resetting conversation: {str(e)}"
         )
+    
+    if not found:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    return {"message": f"Conversation {conversation_id} has been reset"}
 
 @router.get("/chat/status", response_model=SystemStatus)
 async def get_system_status(
@@ -161,11 +216,17 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 @router.websocket("/chat/ws")
-async def websocket_chat_endpoint(websocket: WebSocket):
+async def websocket_chat_endpoint(websocket: WebSocket, token: Optional[str] = None):
     """
-    WebSocket endpoint for real-time chat
-    Note: This is a simplified version. In production, you'd want to add authentication.
+    WebSocket endpoint for real-time chat; authenticate with ?token=<access token>
     """
+    # Browsers can't set headers on a WebSocket, so the token comes in the query
+    try:
+        current_user = await run_in_threadpool(get_current_user, token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
     await manager.connect(websocket)
     try:
         while True:
@@ -174,12 +235,13 @@ async def websocket_chat_endpoint(websocket: WebSocket):
             message_data = json.loads(data)
             
             user_message = message_data.get("message", "")
-            conversation_id = message_data.get("conversation_id", f"ws_{uuid.uuid4().hex[:8]}")
+            conversation_id = message_data.get("conversation_id", f"ws_{current_user.id}_{uuid.uuid4().hex[:8]}")
             
             # Process through multi-agent system
             response = await multi_agent_system.process_user_query(
                 user_query=user_message,
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                user_id=current_user.id
             )
             
             # Send response back to client
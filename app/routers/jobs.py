@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.dependencies import get_current_user
+from app.jobs import get_job_status
+from app.models.users import User
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}")
+def read_job(job_id: str, current_user: User = Depends(get_current_user)):
+    status = get_job_status(job_id, owner_id=current_user.id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
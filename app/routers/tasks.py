@@ -1,66 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
-import json
+from typing import List, Literal, Optional
+import os
+import shutil
+import uuid
 
 from app.crud import tasks as crud_tasks
+from app.crud.analytics import get_cached_task_analytics
 from app.schemas import tasks as schemas_tasks
-from app.database import get_db, engine
-from app.models import tasks as models_tasks
+from app.database import SessionLocal, get_db
 from app.dependencies import get_current_user
 from app.models.users import User
-from app.cache import get_redis_client
-from app.tasks import debug_task # Import the Celery task
+from app.compression import CACHE_KEY_HEADER
+from app.cache import get_or_compute, get_redis_client, invalidate_user_tasks, reads_need_primary, user_tasks_cache_key
+from app.config import settings
+from app.jobs import submit_job
+from app.tasks import debug_task, import_tasks_file # Import the Celery tasks
+from app.utils.task_import import detect_format, iter_task_rows
 
-# Create database tables (This should ideally be handled by Alembic in production)
-models_tasks.Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic migrations (alembic upgrade head), never at import time
 
 router = APIRouter()
 
 @router.post("/tasks/", response_model=schemas_tasks.Task)
-def create_task(task: schemas_tasks.TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return crud_tasks.create_task(db=db, task=task)
+def create_task(task: schemas_tasks.TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
+    db_task = crud_tasks.create_task(db=db, task=task, owner_id=current_user.id)
+    invalidate_user_tasks(redis_client, current_user.id)
+    return db_task
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(crud_tasks.TASK_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in crud_tasks.TASK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Keep a stable column order so equivalent requests share a cache entry
+    return [field for field in crud_tasks.TASK_FIELDS if field in requested]
+
+@router.get("/tasks/", response_model=List[schemas_tasks.TaskFields], response_model_exclude_unset=True)
+def read_tasks(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    sort: Literal["id", "-id", "title", "-title"] = "id",
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis_client),
+):
+    selected_fields = _parse_fields(fields)
+    cache_key = user_tasks_cache_key(
+        redis_client,
+        current_user.id,
+        skip,
+        limit,
+        completed,
+        title_prefix or "",
+        sort,
+        ",".join(selected_fields),
+        "archived" if include_archived else "hot",
+    )
 
-@router.get("/tasks/", response_model=List[schemas_tasks.Task])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
-    # Try to get tasks from Redis cache
-    cache_key = f"tasks:{skip}:{limit}"
-    cached_tasks = redis_client.get(cache_key)
+    # Runs on a miss or as a background refresh, so it opens its own session;
+    # right after a write (a version bump) it reads from the primary
+    def load_tasks():
+        with SessionLocal(primary=reads_need_primary(redis_client, current_user.id)) as db:
+            rows = crud_tasks.get_task_fields(
+                db,
+                owner_id=current_user.id,
+                fields=selected_fields,
+                skip=skip,
+                limit=limit,
+                completed=completed,
+                title_prefix=title_prefix,
+                sort=sort,
+                include_archived=include_archived,
+            )
+            return [schemas_tasks.TaskFields(**row).model_dump(mode="json", exclude_unset=True) for row in rows]
 
-    if cached_tasks:
-        return [schemas_tasks.Task.model_validate_json(task) for task in json.loads(cached_tasks)]
+    # Lets the compression middleware reuse compressed bytes cached under the same key
+    response.headers[CACHE_KEY_HEADER.decode()] = cache_key
+    return get_or_compute(redis_client, cache_key, load_tasks, ttl=60)
 
-    # If not in cache, get from database
-    tasks = crud_tasks.get_tasks(db, skip=skip, limit=limit)
-    
-    # Store in Redis cache (e.g., for 60 seconds)
-    if tasks:
-        redis_client.setex(cache_key, 60, json.dumps([task.model_dump_json() for task in tasks]))
+@router.post("/tasks/import")
+def import_tasks(file: UploadFile, response: Response, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
+    file_format = detect_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file")
 
-    return tasks
+    # Large uploads are handed to a worker; the spooled upload is copied in fixed-size chunks
+    if file.size is not None and file.size > settings.task_import_inline_max_bytes:
+        os.makedirs(settings.task_import_dir, exist_ok=True)
+        path = os.path.join(settings.task_import_dir, f"{uuid.uuid4().hex}.{file_format}")
+        with open(path, "wb") as destination:
+            shutil.copyfileobj(file.file, destination)
+        job_id = submit_job(import_tasks_file, path, current_user.id, file_format, owner_id=current_user.id)
+        response.status_code = 202
+        return {"status": "queued", "job_id": job_id}
+
+    try:
+        result = crud_tasks.bulk_import_tasks(
+            db,
+            owner_id=current_user.id,
+            rows=iter_task_rows(file.file, file_format),
+            chunk_size=settings.task_import_chunk_size,
+        )
+    except UnicodeDecodeError:
+        # Nothing was committed; the session is rolled back when it closes
+        raise HTTPException(status_code=400, detail="The file is not valid UTF-8")
+    invalidate_user_tasks(redis_client, current_user.id)
+    return {"status": "completed", **result}
 
 @router.post("/send-task/{word}")
 async def send_task(word: str, current_user: User = Depends(get_current_user)):
-    debug_task.delay(word)
-    return {"message": f"Task to process '{word}' dispatched to Celery."}
+    job_id = submit_job(debug_task, word, owner_id=current_user.id)
+    return {"message": f"Task to process '{word}' dispatched to Celery.", "job_id": job_id}
+
+@router.get("/tasks/analytics", response_model=schemas_tasks.TaskAnalytics)
+def read_task_analytics(
+    period: Literal["day", "week"] = "day",
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis_client),
+):
+    return get_cached_task_analytics(redis_client, SessionLocal, current_user.id, period=period, days=days)
 
 @router.get("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def read_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_task = crud_tasks.get_task(db, task_id=task_id)
+def read_task(task_id: int, include_archived: bool = False, current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
+    def load_task():
+        with SessionLocal(primary=reads_need_primary(redis_client, current_user.id)) as db:
+            db_task = crud_tasks.get_task(db, task_id=task_id, owner_id=current_user.id, include_archived=include_archived)
+            return schemas_tasks.Task.model_validate(db_task).model_dump(mode="json") if db_task else None
+
+    # Single tasks are hot and small, so they are kept in the in-process L1 cache too
+    cache_key = user_tasks_cache_key(redis_client, current_user.id, "task", task_id, "archived" if include_archived else "hot")
+    db_task = get_or_compute(redis_client, cache_key, load_task, ttl=60, local=True)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @router.put("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def update_task(task_id: int, task: schemas_tasks.TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_task = crud_tasks.update_task(db, task_id=task_id, task=task)
+def update_task(task_id: int, task: schemas_tasks.TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
+    db_task = crud_tasks.update_task(db, task_id=task_id, task=task, owner_id=current_user.id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    invalidate_user_tasks(redis_client, current_user.id)
     return db_task
 
 @router.delete("/tasks/{task_id}", response_model=schemas_tasks.Task)
-def delete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_task = crud_tasks.delete_task(db, task_id=task_id)
+def delete_task(task_id: int, include_archived: bool = False, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), redis_client = Depends(get_redis_client)):
+    db_task = crud_tasks.delete_task(db, task_id=task_id, owner_id=current_user.id, include_archived=include_archived)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    invalidate_user_tasks(redis_client, current_user.id)
     return db_task
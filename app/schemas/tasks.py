@@ -1,9 +1,18 @@
-from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, field_validator
+from typing import Dict, List, Optional
+
+from app.utils.dates import to_naive_utc
 
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = None
+    due_at: Optional[datetime] = None
+
+    @field_validator("due_at")
+    @classmethod
+    def due_at_to_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return to_naive_utc(value)
 
 class TaskCreate(TaskBase):
     pass
@@ -14,6 +23,39 @@ class TaskUpdate(TaskBase):
 class Task(TaskBase):
     id: int
     completed: bool
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class TaskFields(BaseModel):
+    """Task with every field optional, used for sparse fieldset responses"""
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    due_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+class TaskTrendPoint(BaseModel):
+    period: str
+    created: int
+    completed: int
+
+class TaskAnalytics(BaseModel):
+    period: str
+    days: int
+    total_tasks: int
+    completed_tasks: int
+    pending_tasks: int
+    completion_rate: float
+    overdue_tasks: int
+    due_soon_tasks: int
+    lead_time_hours: Dict[str, Optional[float]]
+    trend: List[TaskTrendPoint]
+    next_due: List[Dict]
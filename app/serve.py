@@ -0,0 +1,31 @@
+"""
+Production entry point: python -m app.serve
+
+Runs several uvicorn worker processes on uvloop and httptools, without the
+reload watcher. Each worker builds its own DB and Redis pools in the app
+lifespan.
+"""
+import os
+
+import uvicorn
+
+from app.config import settings
+
+def main():
+    uvicorn.run(
+        "app.main:app",
+        host=settings.serve_host,
+        port=settings.serve_port,
+        workers=settings.serve_workers or os.cpu_count() or 1,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.serve_backlog,
+        timeout_keep_alive=settings.serve_keep_alive,
+        timeout_graceful_shutdown=settings.serve_graceful_timeout,
+        limit_max_requests=settings.serve_max_requests or None,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+if __name__ == "__main__":
+    main()
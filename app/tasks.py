@@ -1,10 +1,63 @@
+import os
 import time
+from datetime import datetime, timedelta
 
 from app.celery_app import celery_app
+from app.config import settings
+from app.cache import get_redis, invalidate_user_tasks
+from app.crud import tasks as crud_tasks
+from app.database import SessionLocal
+from app.reminders import scan_due_tasks
+from app.utils.task_import import iter_task_rows
 
 @celery_app.task
 def debug_task(word: str):
     print(f"Debug task started for: {word}")
     time.sleep(5)  # Simulate a long-running task
     print(f"Debug task completed for: {word}")
-    return {"status": "completed", "word": word} 
\ No newline at end of file
+    return {"status": "completed", "word": word}
+
+@celery_app.task(bind=True)
+def import_tasks_file(self, path: str, owner_id: int, file_format: str):
+    """Stream a spooled upload into the tasks table, reporting progress as it goes"""
+    def report(imported: int, skipped: int):
+        self.update_state(state="PROGRESS", meta={"imported": imported, "skipped": skipped})
+
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as upload:
+            result = crud_tasks.bulk_import_tasks(
+                db,
+                owner_id=owner_id,
+                rows=iter_task_rows(upload, file_format),
+                chunk_size=settings.task_import_chunk_size,
+                on_progress=report,
+            )
+    finally:
+        db.close()
+        os.remove(path)
+
+    invalidate_user_tasks(get_redis(), owner_id)
+    return {"status": "completed", **result}
+
+@celery_app.task
+def send_due_reminders():
+    return {"status": "completed", "sent": scan_due_tasks()}
+
+@celery_app.task
+def archive_completed_tasks():
+    """Move old completed tasks to tasks_archive, one committed batch at a time"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.archive_after_days)
+    redis_client = get_redis()
+    archived = 0
+    while True:
+        with SessionLocal() as db:
+            batch = crud_tasks.archive_completed_tasks(db, completed_before=cutoff, limit=settings.archive_batch_size)
+            db.commit()
+        if not batch:
+            break
+        archived += len(batch)
+        # Cached task lists no longer match the hot table for these owners
+        for owner_id in {row["owner_id"] for row in batch}:
+            invalidate_user_tasks(redis_client, owner_id)
+    return {"status": "completed", "archived": archived}
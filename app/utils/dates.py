@@ -0,0 +1,8 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert aware values instead of dropping their offset"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
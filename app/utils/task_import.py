@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from app.utils.dates import to_naive_utc
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+# (title, description, completed, due_at)
+TaskRow = Tuple[str, Optional[str], bool, Optional[datetime]]
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "y")
+
+def _to_row(record: dict) -> Optional[TaskRow]:
+    """A validated row, or None for a malformed record (NDJSON values can be any JSON type)"""
+    title = record.get("title")
+    description = record.get("description") or None
+    completed = record.get("completed")
+    due_at = record.get("due_at") or None
+    if not isinstance(title, str) or not title.strip():
+        return None
+    if description is not None and not isinstance(description, str):
+        return None
+    if completed is not None and not isinstance(completed, (bool, int, str)):
+        return None
+    if due_at is not None:
+        if not isinstance(due_at, str):
+            return None
+        try:
+            due_at = to_naive_utc(datetime.fromisoformat(due_at))
+        except ValueError:
+            return None
+    return title.strip(), description, _parse_bool(completed), due_at
+
+def iter_task_rows(stream: BinaryIO, file_format: str) -> Iterator[Optional[TaskRow]]:
+    """
+    Parse an uploaded file one line at a time, so memory stays bounded by the
+    size of a single record. Malformed records are yielded as None so the
+    caller can count them as skipped. Input that is not UTF-8 raises
+    UnicodeDecodeError.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        if file_format == "csv":
+            for record in csv.DictReader(text):
+                yield _to_row(record)
+        elif file_format == "ndjson":
+            for line in text:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None
+                    continue
+                yield _to_row(record) if isinstance(record, dict) else None
+        else:
+            raise ValueError(f"Unsupported import format: {file_format}")
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
@@ -0,0 +1,106 @@
+"""
+Latency of one user's task list and search, with and without archived tasks,
+and of their analytics, as their rows in tasks_archive grow. Archived rows
+are only read in index order up to the requested page, and analytics reads
+only the ones completed inside its window, so none of these should grow with
+the archive.
+
+The archive stops at 1M rows by default, since filling SQLite takes most of
+the run; pass larger sizes to main() to go further.
+
+    python -m benchmarks.archive_growth
+"""
+import os
+import random
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from sqlalchemy import func, select
+
+from app.crud.analytics import get_task_analytics
+from app.crud.tasks import get_task_fields
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import ArchivedTask, Task
+from app.models.users import User
+
+OWNER_ID = 1
+HOT_TASKS = 500
+FIELDS = ["id", "title", "completed", "due_at"]
+
+CASES = [
+    ("hot", lambda db: get_task_fields(db, owner_id=OWNER_ID, fields=FIELDS, limit=50)),
+    ("+archive", lambda db: get_task_fields(db, owner_id=OWNER_ID, fields=FIELDS, limit=50, include_archived=True)),
+    ("+archive title", lambda db: get_task_fields(
+        db, owner_id=OWNER_ID, fields=FIELDS, limit=50, sort="title", include_archived=True)),
+    ("+archive prefix", lambda db: get_task_fields(
+        db, owner_id=OWNER_ID, fields=FIELDS, limit=50, title_prefix="task 12", include_archived=True)),
+    ("analytics", lambda db: get_task_analytics(db, owner_id=OWNER_ID, days=30)),
+]
+
+
+def _archive_rows(first_id: int, count: int, rng: random.Random):
+    # Archived tasks were completed more than ARCHIVE_AFTER_DAYS (90) ago
+    start = datetime.utcnow() - timedelta(days=3 * 365)
+    rows = []
+    for task_id in range(first_id, first_id + count):
+        created_at = start + timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+        rows.append({
+            "id": task_id,
+            "owner_id": OWNER_ID,
+            "title": f"task {rng.randint(0, 99999)}",
+            "completed": True,
+            "created_at": created_at,
+            "completed_at": created_at + timedelta(hours=rng.randint(1, 200)),
+        })
+    return rows
+
+
+def _grow(total: int, rng: random.Random, batch: int = 50000):
+    with engine.begin() as conn:
+        current = conn.execute(select(func.count()).select_from(ArchivedTask)).scalar()
+        while current < total:
+            count = min(batch, total - current)
+            # Archived ids sit below the hot ones, as they were assigned earlier
+            conn.execute(ArchivedTask.__table__.insert(), _archive_rows(current + 1, count, rng))
+            current += count
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def main(sizes=(0, 10_000, 100_000, 1_000_000), number: int = 100):
+    # Scratch database only; the real schema is managed by Alembic
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": OWNER_ID, "username": "bench", "hashed_password": "x"}])
+        conn.execute(Task.__table__.insert(), [
+            {
+                "id": 10_000_000 + number_,
+                "owner_id": OWNER_ID,
+                "title": f"task {rng.randint(0, 99999)}",
+                "completed": rng.random() < 0.5,
+                "created_at": now - timedelta(days=rng.randint(0, 60)),
+                "due_at": now + timedelta(days=rng.randint(-10, 30)),
+            }
+            for number_ in range(HOT_TASKS)
+        ])
+
+    print(f"{'archived':>9} " + " ".join(f"{name:>16}" for name, _ in CASES))
+    for size in sizes:
+        _grow(size, rng)
+        timings = []
+        with SessionLocal() as db:
+            for _, fetch in CASES:
+                fetch(db)
+                timings.append(timeit.timeit(lambda: fetch(db), number=number) / number * 1e6)
+        print(f"{size:>9} " + " ".join(f"{us:>14.0f}us" for us in timings))
+
+
+if __name__ == "__main__":
+    main()
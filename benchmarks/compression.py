@@ -0,0 +1,61 @@
+"""
+CPU time against bytes saved for zstd and gzip at several levels, on a task
+list payload shaped like GET /api/v1/tasks/ returns.
+
+    python -m benchmarks.compression
+"""
+import gzip
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import zstandard
+
+WORDS = "review write plan call email fix deploy update draft report meeting budget team client".split()
+
+
+def task_list_payload(count: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    tasks = []
+    for task_id in range(1, count + 1):
+        created_at = start + timedelta(minutes=rng.randint(0, 500000))
+        completed = rng.random() < 0.6
+        tasks.append({
+            "id": task_id,
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize(),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 20))) or None,
+            "completed": completed,
+            "created_at": created_at.isoformat(),
+            "completed_at": (created_at + timedelta(hours=rng.randint(1, 200))).isoformat() if completed else None,
+            "due_at": (created_at + timedelta(days=rng.randint(1, 30))).isoformat() if rng.random() < 0.5 else None,
+        })
+    return json.dumps(tasks).encode()
+
+
+CODECS = [
+    *((f"zstd-{level}", zstandard.ZstdCompressor(level=level).compress, zstandard.ZstdDecompressor().decompress)
+      for level in (1, 3, 6, 10, 19)),
+    *((f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level), gzip.decompress)
+      for level in (1, 6, 9)),
+]
+
+
+def main(counts=(10, 100, 1000), number: int = 50):
+    print(f"{'tasks':>6} {'codec':<8} {'bytes':>9} {'ratio':>6} {'compress':>12} {'decompress':>12}")
+    for count in counts:
+        body = task_list_payload(count)
+        print(f"{count:>6} {'none':<8} {len(body):>9}")
+        for name, compress, decompress in CODECS:
+            compressed = compress(body)
+            compress_us = timeit.timeit(lambda: compress(body), number=number) / number * 1e6
+            decompress_us = timeit.timeit(lambda: decompress(compressed), number=number) / number * 1e6
+            print(
+                f"{count:>6} {name:<8} {len(compressed):>9} {len(body) / len(compressed):>6.1f} "
+                f"{compress_us:>10.0f}us {decompress_us:>10.0f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
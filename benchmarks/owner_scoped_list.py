@@ -0,0 +1,91 @@
+"""
+Latency of one user's task list (get_task_fields, first page) as the rows
+belonging to other users grow. Every list query is scoped to its owner and
+every task index leads with owner_id, so the time should stay flat however
+large the table gets.
+
+The requested range went to 10M total rows; the default stops at 1M, since
+filling SQLite takes most of the run. Pass larger totals to main() to go
+further.
+
+    python -m benchmarks.owner_scoped_list
+"""
+import os
+import random
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from sqlalchemy import func, select
+
+from app.crud.tasks import get_task_fields
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import Task
+from app.models.users import User
+
+OWNER_ID = 1
+OWNER_TASKS = 200
+OTHER_OWNERS = 1000
+FIELDS = ["id", "title", "completed", "due_at"]
+
+CASES = [
+    ("by id", {}),
+    ("by title", {"sort": "title"}),
+    ("pending, by id", {"completed": False}),
+    ("title prefix", {"title_prefix": "task 1"}),
+]
+
+
+def _task_rows(owner_ids, count: int, rng: random.Random):
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "owner_id": rng.choice(owner_ids),
+            "title": f"task {rng.randint(0, 99999)}",
+            "completed": rng.random() < 0.6,
+            "created_at": start + timedelta(minutes=rng.randint(0, 500000)),
+        }
+        for _ in range(count)
+    ]
+
+
+def _grow(total: int, rng: random.Random, batch: int = 50000):
+    with engine.begin() as conn:
+        current = conn.execute(select(func.count()).select_from(Task)).scalar()
+        while current < total:
+            count = min(batch, total - current)
+            conn.execute(Task.__table__.insert(), _task_rows(range(2, OTHER_OWNERS + 2), count, rng))
+            current += count
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def main(totals=(10_000, 100_000, 1_000_000), number: int = 200):
+    # Scratch database only; the real schema is managed by Alembic
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "hashed_password": "x"}
+            for user_id in range(1, OTHER_OWNERS + 2)
+        ])
+        conn.execute(Task.__table__.insert(), _task_rows([OWNER_ID], OWNER_TASKS, rng))
+
+    print(f"{'total rows':>11} " + " ".join(f"{name:>16}" for name, _ in CASES))
+    for total in totals:
+        _grow(total, rng)
+        timings = []
+        with SessionLocal() as db:
+            for _, kwargs in CASES:
+                fetch = lambda: get_task_fields(db, owner_id=OWNER_ID, fields=FIELDS, limit=50, **kwargs)
+                fetch()
+                timings.append(timeit.timeit(fetch, number=number) / number * 1e6)
+        print(f"{total:>11} " + " ".join(f"{us:>14.0f}us" for us in timings))
+
+
+if __name__ == "__main__":
+    main()
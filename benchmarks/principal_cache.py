@@ -0,0 +1,53 @@
+"""
+Cost of resolving the authenticated principal from L1, from L2 (Redis) and
+from the database, i.e. what get_current_user pays per request on each path.
+
+    python -m benchmarks.principal_cache
+"""
+import os
+import tempfile
+import timeit
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import fakeredis
+
+from app.cache import get_or_compute, local_cache
+from app.database import Base, SessionLocal, engine
+from app.dependencies import _load_principal
+from app.models.users import User
+
+USERNAME = "bench"
+KEY = f"user:{USERNAME}"
+
+
+def _report(name: str, seconds: float, number: int):
+    print(f"{name:<10} {seconds / number * 1e6:10.1f} us/lookup")
+
+
+def main(number: int = 20000):
+    # Scratch database only; the real schema is managed by Alembic
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(User).filter(User.username == USERNAME).first() is None:
+            db.add(User(username=USERNAME, hashed_password="x"))
+            db.commit()
+
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    load = lambda: _load_principal(USERNAME)
+
+    local_cache.enabled = True
+    get_or_compute(redis_client, KEY, load, ttl=300, local=True)
+    _report("L1 hit", timeit.timeit(lambda: get_or_compute(redis_client, KEY, load, ttl=300, local=True), number=number), number)
+
+    local_cache.enabled = False
+    _report("L2 hit", timeit.timeit(lambda: get_or_compute(redis_client, KEY, load, ttl=300), number=number), number)
+
+    db_number = number // 10
+    _report("DB", timeit.timeit(load, number=db_number), db_number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Cost of one reminder scan window (claim_due_tasks) as the tasks table grows.
+The reminder index holds only pending tasks that were never reminded, so a
+claim ranges over the due window alone and should stay flat however many
+completed, already-reminded or far-off tasks the table holds.
+
+The requested table size was 10M rows; the default stops at 1M, since filling
+SQLite takes most of the run. Pass larger totals to main() to go further.
+SQLite ignores FOR UPDATE SKIP LOCKED, so this times the index range scan
+and the update, not lock contention. main(index="pending") swaps in an
+index over all pending tasks, as before migration 0005, for comparison.
+
+    python -m benchmarks.reminder_scan
+"""
+import os
+import random
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from sqlalchemy import func, select
+
+from app.crud.tasks import claim_due_tasks
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import Task
+from app.models.users import User
+
+OWNERS = 1000
+DUE_PER_WINDOW = 100
+LEAD = timedelta(minutes=15)
+BACKFILL = timedelta(days=1)
+
+
+def _background_rows(count: int, now: datetime, rng: random.Random):
+    # Completed, already reminded, or due far from now: none of them may be claimed
+    rows = []
+    for _ in range(count):
+        kind = rng.random()
+        due_at = now + timedelta(days=rng.uniform(-365, 365))
+        row = {
+            "owner_id": rng.randint(1, OWNERS),
+            "title": "background",
+            "created_at": now - timedelta(days=400),
+            "reminded_at": None,
+        }
+        if kind < 0.6:
+            row.update(completed=True, due_at=due_at)
+        elif kind < 0.9:
+            row.update(completed=False, due_at=now - timedelta(seconds=rng.uniform(0, BACKFILL.total_seconds())),
+                       reminded_at=now - timedelta(hours=1))
+        else:
+            row.update(completed=False, due_at=now + LEAD + timedelta(days=rng.uniform(1, 365)))
+        rows.append(row)
+    return rows
+
+
+def _due_rows(now: datetime, rng: random.Random):
+    return [
+        {
+            "owner_id": rng.randint(1, OWNERS),
+            "title": "due",
+            "completed": False,
+            "created_at": now - timedelta(days=1),
+            "due_at": now + timedelta(seconds=rng.uniform(0, LEAD.total_seconds())),
+            "reminded_at": None,
+        }
+        for _ in range(DUE_PER_WINDOW)
+    ]
+
+
+def _grow(total: int, now: datetime, rng: random.Random, batch: int = 50000):
+    with engine.begin() as conn:
+        current = conn.execute(select(func.count()).select_from(Task)).scalar()
+        while current < total:
+            count = min(batch, total - current)
+            conn.execute(Task.__table__.insert(), _background_rows(count, now, rng))
+            current += count
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _claim_window(now: datetime, rng: random.Random) -> float:
+    """Seconds to claim one fresh window of due tasks plus an (empty) backfill pass"""
+    with engine.begin() as conn:
+        conn.execute(Task.__table__.insert(), _due_rows(now, rng))
+
+    def scan():
+        for since, until in ((now - timedelta(minutes=1), now + LEAD), (now - BACKFILL, now - timedelta(minutes=1))):
+            with SessionLocal() as db:
+                claimed = claim_due_tasks(db, since=since, until=until, limit=500, claimed_at=now)
+                db.commit()
+        return claimed
+
+    return timeit.timeit(scan, number=1)
+
+
+def main(totals=(10_000, 100_000, 1_000_000), repeat: int = 20, index: str = "unreminded"):
+    # Scratch database only; the real schema is managed by Alembic
+    Base.metadata.create_all(bind=engine)
+    if index == "pending":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_tasks_due_at_unreminded")
+            conn.exec_driver_sql("CREATE INDEX ix_tasks_due_at_pending ON tasks (due_at) WHERE completed = 0")
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "hashed_password": "x"} for user_id in range(1, OWNERS + 1)
+        ])
+
+    print(f"{'total rows':>11} {'scan':>12}")
+    for total in totals:
+        _grow(total, now, rng)
+        timings = sorted(_claim_window(now, rng) for _ in range(repeat))
+        print(f"{total:>11} {timings[len(timings) // 2] * 1e6:>10.0f}us")
+
+
+if __name__ == "__main__":
+    import sys
+    main(index=sys.argv[1] if len(sys.argv) > 1 else "unreminded")
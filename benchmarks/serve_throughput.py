@@ -0,0 +1,93 @@
+"""
+Requests per second and latency percentiles of the previous dev server command
+(uvicorn --reload) against python -m app.serve, under the same concurrent
+load on GET /, which touches neither the database nor Redis. The load
+generator runs on the same machine, so give it spare cores: with N CPUs,
+app.serve starts N workers.
+
+    python -m benchmarks.serve_throughput
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+COMMANDS = {
+    "uvicorn --reload": [sys.executable, "-m", "uvicorn", "app.main:app", "--host", HOST, "--port", str(PORT), "--reload"],
+    "app.serve": [sys.executable, "-m", "app.serve"],
+}
+
+
+def _env() -> dict:
+    return {
+        **os.environ,
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"),
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "unused"),
+        "SERVE_HOST": HOST,
+        "SERVE_PORT": str(PORT),
+    }
+
+
+def _wait_ready(timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://{HOST}:{PORT}/").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+
+async def _load(requests: int, concurrency: int) -> list:
+    latencies = []
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{PORT}", limits=limits) as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get("/")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def run(name: str, requests: int, concurrency: int):
+    server = subprocess.Popen(
+        COMMANDS[name], env=_env(), start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready()
+        asyncio.run(_load(concurrency * 10, concurrency))  # warm up every worker
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(_load(requests, concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+    def percentile(q):
+        return latencies[int(len(latencies) * q) - 1] * 1000
+
+    print(f"{name:<18} {requests / elapsed:>8.0f} req/s {percentile(0.5):>8.1f}ms {percentile(0.99):>8.1f}ms")
+
+
+def main(requests: int = 5000, concurrency: int = 50):
+    print(f"{'server':<18} {'throughput':>14} {'p50':>10} {'p99':>10}   ({os.cpu_count()} CPUs, {concurrency} concurrent)")
+    for name in COMMANDS:
+        run(name, requests, concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-request cost of access-token checks: issuing a token, decoding it with no
+revocation check, verifying it with an empty and with a large in-process
+revocation set, and revoking one token. verify_token runs on every
+authenticated request, so it must stay in the microseconds and independent of
+how many tokens were revoked.
+
+The last rows are the whole authentication path of one /api/v1 request:
+admission control decodes the token to key its rate limit, then
+get_current_user checks it and resolves the principal from L1. Those rows
+compare reusing admission's claims with decoding the token twice.
+
+    python -m benchmarks.token_verification
+"""
+import os
+import tempfile
+import time
+import timeit
+import uuid
+from types import SimpleNamespace
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import fakeredis
+from jose import jwt
+
+from app import dependencies
+from app.admission import TOKEN_CLAIMS_STATE
+from app.auth import ALGORITHM, SECRET_KEY, create_access_token, get_token_claims, revoked_tokens, verify_token
+from app.cache import local_cache
+from app.database import Base, SessionLocal, engine
+from app.models.users import User
+
+USERNAME = "bench"
+
+
+def _report(name: str, seconds: float, number: int):
+    print(f"{name:<40} {seconds / number * 1e6:8.1f} us/op")
+
+
+def _request_with_claims(claims: dict):
+    return SimpleNamespace(state=SimpleNamespace(**{TOKEN_CLAIMS_STATE: claims}))
+
+
+def main(number: int = 20000):
+    error = ValueError("invalid token")
+    token = create_access_token({"sub": USERNAME})
+
+    _report("create_access_token", timeit.timeit(lambda: create_access_token({"sub": USERNAME}), number=number), number)
+    _report("jwt.decode, no revocation check", timeit.timeit(
+        lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), number=number), number)
+    _report("verify_token, 0 revoked", timeit.timeit(lambda: verify_token(token, error), number=number), number)
+
+    expiry = time.time() + 3600
+    for _ in range(100000):
+        revoked_tokens.add(uuid.uuid4().hex, expiry)
+    _report("verify_token, 100k revoked", timeit.timeit(lambda: verify_token(token, error), number=number), number)
+    _report("revocation set add", timeit.timeit(lambda: revoked_tokens.add(uuid.uuid4().hex, expiry), number=number), number)
+
+    # Whole request path, principal served from L1; scratch database only
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(User).filter(User.username == USERNAME).first() is None:
+            db.add(User(username=USERNAME, hashed_password="x"))
+            db.commit()
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    dependencies.get_redis = lambda: redis_client
+    local_cache.enabled = True
+
+    def request_claims_reused():
+        claims = get_token_claims(token)
+        dependencies.get_current_user(token, _request_with_claims(claims))
+
+    def request_decoded_twice():
+        get_token_claims(token)
+        dependencies.get_current_user(token)
+
+    request_claims_reused()
+    _report("request: admission + get_current_user", timeit.timeit(request_claims_reused, number=number), number)
+    _report("request: same, token decoded twice", timeit.timeit(request_decoded_twice, number=number), number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the environment is set before any app import
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    # A large pool, so hundreds of threads can hold a connection at once
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True, max_connections=2000)
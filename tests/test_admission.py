@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+
+import fakeredis
+import httpx
+from fastapi import Depends, FastAPI
+
+from app import admission, auth, dependencies
+from app.admission import CHAT, CRUD, TOKEN_BUCKET_SCRIPT, AdmissionControlMiddleware, RouteGroup, configure_executors
+
+CHAT_SECONDS = 0.2
+
+
+def _app(monkeypatch, chat_concurrency=4, chat_queue=8, crud_rate=100000.0, crud_burst=100000):
+    monkeypatch.setitem(admission.groups, CHAT, RouteGroup(CHAT, chat_concurrency, chat_queue, 100000, 100000))
+    monkeypatch.setitem(admission.groups, CRUD, RouteGroup(CRUD, 64, 256, crud_rate, crud_burst))
+    monkeypatch.setattr(admission.settings, "admission_shed_queue_depth", 1000)
+
+    api = FastAPI()
+
+    @api.post("/api/v1/chatbot/chat")
+    async def chat():
+        await asyncio.sleep(CHAT_SECONDS)
+        return {"response": "ok"}
+
+    @api.get("/api/v1/tasks/")
+    async def tasks():
+        return []
+
+    return _with_admission(api)
+
+
+def _with_admission(api):
+    middleware = AdmissionControlMiddleware(api)
+    middleware.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    middleware.token_bucket = middleware.redis.register_script(TOKEN_BUCKET_SCRIPT)
+    return middleware
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_crud_p99_stays_low_while_chat_is_saturated(monkeypatch):
+    app = _app(monkeypatch)
+
+    async def run():
+        async with _client(app) as client:
+            chat = [asyncio.create_task(client.post("/api/v1/chatbot/chat")) for _ in range(40)]
+            await asyncio.sleep(0.01)
+
+            latencies = []
+            for _ in range(200):
+                start = time.perf_counter()
+                response = await client.get("/api/v1/tasks/")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+            return latencies, [response.status_code for response in await asyncio.gather(*chat)]
+
+    latencies, chat_statuses = asyncio.run(run())
+
+    p99 = sorted(latencies)[int(len(latencies) * 0.99) - 1]
+    # Chat is saturated: a bounded number is admitted and the rest are shed
+    assert chat_statuses.count(200) == 4 + 8
+    assert chat_statuses.count(503) == 40 - 12
+    # CRUD never waits behind chat, whose requests each take CHAT_SECONDS
+    assert p99 < CHAT_SECONDS / 4
+
+
+def test_empty_token_bucket_returns_429_with_retry_after(monkeypatch):
+    app = _app(monkeypatch, crud_rate=60, crud_burst=2)
+
+    async def run():
+        async with _client(app) as client:
+            return [await client.get("/api/v1/tasks/") for _ in range(3)]
+
+    responses = asyncio.run(run())
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert int(responses[-1].headers["retry-after"]) >= 1
+
+
+def test_sync_crud_p99_stays_flat_while_chat_blocks_its_executor(monkeypatch):
+    # Every chat request is admitted and blocks a thread; only the chat executor's threads
+    monkeypatch.setitem(admission.groups, CHAT, RouteGroup(CHAT, 40, 40, 100000, 100000))
+    monkeypatch.setitem(admission.groups, CRUD, RouteGroup(CRUD, 64, 256, 100000, 100000))
+    monkeypatch.setattr(admission.settings, "admission_shed_queue_depth", 1000)
+    monkeypatch.setattr(admission.settings, "chat_executor_threads", 2)
+    monkeypatch.setattr(admission.settings, "crud_threadpool_size", 8)
+    threads = {"chat": set(), "crud": set()}
+
+    api = FastAPI()
+
+    @api.post("/api/v1/chatbot/chat")
+    async def chat():
+        def blocking_llm_call():
+            threads["chat"].add(threading.current_thread().name)
+            time.sleep(CHAT_SECONDS)
+        await asyncio.get_running_loop().run_in_executor(None, blocking_llm_call)
+        return {"response": "ok"}
+
+    @api.get("/api/v1/tasks/")
+    def tasks():
+        threads["crud"].add(threading.current_thread().name)
+        return []
+
+    app = _with_admission(api)
+
+    async def crud_latencies(client, count=100):
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.get("/api/v1/tasks/")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+        return sorted(latencies)[int(count * 0.99) - 1]
+
+    async def run():
+        configure_executors()
+        async with _client(app) as client:
+            idle_p99 = await crud_latencies(client)
+            chat = [asyncio.create_task(client.post("/api/v1/chatbot/chat")) for _ in range(40)]
+            await asyncio.sleep(0.01)
+            loaded_p99 = await crud_latencies(client)
+            statuses = [response.status_code for response in await asyncio.gather(*chat)]
+            return idle_p99, loaded_p99, statuses
+
+    idle_p99, loaded_p99, statuses = asyncio.run(run())
+
+    assert statuses == [200] * 40
+    assert threads["chat"] and all(name.startswith("chat") for name in threads["chat"])
+    assert not any(name.startswith("chat") for name in threads["crud"])
+    # 40 chat calls queue for 2 threads (4s of work); CRUD never waits behind them
+    assert loaded_p99 < max(idle_p99 * 5, CHAT_SECONDS / 4)
+
+
+def test_token_is_decoded_once_per_request(monkeypatch):
+    monkeypatch.setitem(admission.groups, CRUD, RouteGroup(CRUD, 64, 256, 100000, 100000))
+    monkeypatch.setattr(dependencies, "get_or_compute", lambda *args, **kwargs: {"id": 1, "username": "alice"})
+    decode = auth.jwt.decode
+    decodes = []
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+    token = auth.create_access_token({"sub": "alice"})
+
+    api = FastAPI()
+
+    @api.get("/api/v1/me")
+    def me(current_user=Depends(dependencies.get_current_user)):
+        return {"username": current_user.username}
+
+    app = _with_admission(api)
+
+    async def run():
+        async with _client(app) as client:
+            valid = await client.get("/api/v1/me", headers={"Authorization": f"Bearer {token}"})
+            valid_decodes = len(decodes)
+            invalid = await client.get("/api/v1/me", headers={"Authorization": "Bearer not-a-token"})
+            return valid, valid_decodes, invalid
+
+    valid, valid_decodes, invalid = asyncio.run(run())
+
+    assert valid.status_code == 200 and valid.json() == {"username": "alice"}
+    # Decoded in admission; get_current_user reuses its claims
+    assert valid_decodes == 1
+    assert invalid.status_code == 401
+
+
+def test_revoked_token_is_rejected_with_admission_claims(monkeypatch):
+    monkeypatch.setitem(admission.groups, CRUD, RouteGroup(CRUD, 64, 256, 100000, 100000))
+    monkeypatch.setattr(dependencies, "get_or_compute", lambda *args, **kwargs: {"id": 1, "username": "alice"})
+    token = auth.create_access_token({"sub": "alice"})
+    claims = auth.get_token_claims(token)
+    monkeypatch.setattr(auth.revoked_tokens, "_expiry", {claims["jti"]: claims["exp"]})
+
+    api = FastAPI()
+
+    @api.get("/api/v1/me")
+    def me(current_user=Depends(dependencies.get_current_user)):
+        return {"username": current_user.username}
+
+    async def run():
+        async with _client(_with_admission(api)) as client:
+            return await client.get("/api/v1/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert asyncio.run(run()).status_code == 401
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.analytics import get_task_analytics
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import ArchivedTask, Task
+from app.models.users import User
+
+
+@pytest.fixture
+def db():
+    # Scratch SQLite schema; real databases are migrated with Alembic
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def owner(db):
+    user = User(username="owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_empty_history(db, owner):
+    analytics = get_task_analytics(db, owner_id=owner.id)
+
+    assert analytics["total_tasks"] == 0
+    assert analytics["completion_rate"] == 0.0
+    assert analytics["lead_time_hours"] == {"mean": None, "median": None, "p90": None}
+    assert analytics["trend"] == [] and analytics["next_due"] == []
+
+
+def test_totals_deadlines_and_window(db, owner):
+    now = datetime.utcnow()
+    for days in range(1, 8):
+        db.add(Task(owner_id=owner.id, title=f"overdue {days}", created_at=now - timedelta(days=20),
+                    due_at=now - timedelta(days=days)))
+    db.add(Task(owner_id=owner.id, title="due soon", created_at=now - timedelta(days=1), due_at=now + timedelta(days=2)))
+    db.add(Task(owner_id=owner.id, title="due later", created_at=now - timedelta(days=1), due_at=now + timedelta(days=30)))
+    db.add(Task(owner_id=owner.id, title="done", completed=True, created_at=now - timedelta(days=3),
+                completed_at=now - timedelta(days=2), due_at=now - timedelta(days=1)))
+    db.add(Task(owner_id=owner.id, title="old", completed=True, created_at=now - timedelta(days=100),
+                completed_at=now - timedelta(days=99)))
+    db.add(ArchivedTask(id=1000, owner_id=owner.id, title="archived", completed=True,
+                        created_at=now - timedelta(days=200), completed_at=now - timedelta(days=150)))
+    db.add(Task(owner_id=owner.id + 1, title="someone else", due_at=now - timedelta(days=1)))
+    db.commit()
+
+    analytics = get_task_analytics(db, owner_id=owner.id, days=30)
+
+    assert analytics["total_tasks"] == 12
+    assert analytics["completed_tasks"] == 3
+    assert analytics["overdue_tasks"] == 7
+    assert analytics["due_soon_tasks"] == 1
+    # Earliest deadlines first, completed tasks excluded, at most five
+    assert [row["title"] for row in analytics["next_due"]] == [f"overdue {days}" for days in (7, 6, 5, 4, 3)]
+    # Only the task completed inside the window counts towards lead times
+    assert analytics["lead_time_hours"]["mean"] == 24.0
+    # Created within the last 30 days: every hot task but "old"
+    assert sum(point["created"] for point in analytics["trend"]) == 10
+    assert sum(point["completed"] for point in analytics["trend"]) == 1
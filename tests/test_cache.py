@@ -0,0 +1,69 @@
+import threading
+import time
+
+from app import cache
+from app.cache import get_or_compute
+
+
+def _run_concurrently(count, target):
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(target())
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_compute_once(redis_client):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"tasks": [1, 2, 3]}
+
+    results = _run_concurrently(500, lambda: get_or_compute(redis_client, "stampede", compute, ttl=60))
+
+    assert len(calls) == 1
+    assert results == [{"tasks": [1, 2, 3]}] * 500
+
+
+def test_lock_holder_rereads_value_stored_after_miss(redis_client, monkeypatch):
+    # The value lands between this caller's miss and its lock acquisition
+    original_get = redis_client.get
+    seen = []
+
+    def get(key):
+        value = original_get(key)
+        if key == "late" and not seen:
+            seen.append(1)
+            cache._store(redis_client, "late", "stored", 60, 30, 0.0)
+        return value
+
+    monkeypatch.setattr(redis_client, "get", get)
+    result = get_or_compute(redis_client, "late", lambda: "recomputed", ttl=60)
+
+    assert result == "stored"
+
+
+def test_stale_value_served_while_refreshing_once(redis_client):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return len(calls)
+
+    assert get_or_compute(redis_client, "stale", compute, ttl=60, soft_ttl=0) == 1
+    results = _run_concurrently(50, lambda: get_or_compute(redis_client, "stale", compute, ttl=60, soft_ttl=0))
+
+    assert results == [1] * 50
+    time.sleep(0.3)
+    assert len(calls) == 2
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import tasks as crud_tasks
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import ArchivedTask, Task
+from app.models.users import User
+
+
+@pytest.fixture
+def db():
+    # Scratch SQLite schema; real databases are migrated with Alembic
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def owner(db):
+    user = User(username="owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _pages(fetch, page_size, total):
+    ids = []
+    for skip in range(0, total, page_size):
+        ids += [row["id"] for row in fetch(skip, page_size)]
+    return ids
+
+
+@pytest.mark.parametrize("sort", ["title", "-title"])
+@pytest.mark.parametrize("include_archived", [False, True])
+def test_title_pages_are_stable_when_titles_repeat(db, owner, sort, include_archived):
+    completed_at = datetime.utcnow() - timedelta(days=365)
+    for number in range(12):
+        db.add(Task(owner_id=owner.id, title=f"same {number % 2}", completed=True, completed_at=completed_at))
+    db.commit()
+    if include_archived:
+        crud_tasks.archive_completed_tasks(db, completed_before=datetime.utcnow(), limit=5)
+        db.commit()
+        assert db.query(ArchivedTask).count() == 5
+
+    def fetch(skip, limit):
+        return crud_tasks.get_task_fields(
+            db, owner_id=owner.id, fields=["id", "title"], skip=skip, limit=limit, sort=sort,
+            include_archived=include_archived,
+        )
+
+    ids = _pages(fetch, page_size=5, total=12)
+
+    assert len(ids) == len(set(ids)) == 12
+    assert ids == [row["id"] for row in fetch(0, 100)]
@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import database
+from app.database import Base, SessionLocal
+from app.models.users import User
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # Two SQLite files: the primary and a "replica" that never receives the writes
+    directory = tempfile.mkdtemp()
+    primary = create_engine(f"sqlite:///{os.path.join(directory, 'primary.db')}")
+    replica = create_engine(f"sqlite:///{os.path.join(directory, 'replica.db')}")
+    for bind in (primary, replica):
+        Base.metadata.create_all(bind=bind)
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    yield replica
+    primary.dispose()
+    replica.dispose()
+
+
+def test_session_reads_its_own_writes_after_commit(replica):
+    with SessionLocal() as db:
+        user = User(username="writer", hashed_password="x")
+        db.add(user)
+        db.commit()
+        # Expired attributes are refreshed from the primary, not the empty replica
+        assert user.id is not None
+        db.refresh(user)
+        assert db.query(User).filter(User.username == "writer").count() == 1
+
+
+def test_session_reads_replica_until_it_writes(replica):
+    with SessionLocal() as db:
+        assert db.query(User).count() == 0
+        assert db.get_bind(clause=User.__table__.select()) is replica
+
+    with SessionLocal() as db:
+        db.add(User(username="writer", hashed_password="x"))
+        db.commit()
+        assert db.get_bind(clause=User.__table__.select()) is database.engine
+
+    # A new session starts on the replica again
+    with SessionLocal() as db:
+        assert db.get_bind(clause=User.__table__.select()) is replica
@@ -0,0 +1,42 @@
+import pytest
+from celery import signature
+
+from app import jobs
+from app.celery_app import celery_app
+
+
+@celery_app.task
+def add(x, y):
+    return x + y
+
+
+@pytest.fixture(autouse=True)
+def eager_celery(redis_client, monkeypatch):
+    # Eager mode with an in-memory result backend, as in local development without a worker
+    monkeypatch.setitem(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setitem(celery_app.conf, "result_backend", "cache+memory://")
+    # The backend is cached per thread; fresh local state rebuilds it from the patched URL
+    monkeypatch.setattr(celery_app, "_local", type(celery_app._local)())
+    monkeypatch.setattr(jobs, "get_redis", lambda: redis_client)
+
+
+def test_submitted_job_reports_its_result():
+    job_id = jobs.submit_job(add, 2, 3, owner_id=1)
+
+    assert jobs.get_job_status(job_id, owner_id=1) == {"job_id": job_id, "state": "SUCCESS", "result": 5}
+
+
+def test_job_is_hidden_from_other_owners():
+    job_id = jobs.submit_job(add, 2, 3, owner_id=1)
+
+    assert jobs.get_job_status(job_id, owner_id=2) is None
+    assert jobs.get_job_status("unknown", owner_id=1) is None
+
+
+def test_group_reports_progress_over_all_members():
+    job_id = jobs.submit_group([signature(add, args=(i, i)) for i in range(3)], owner_id=1)
+
+    status = jobs.get_job_status(job_id, owner_id=1)
+
+    assert status == {"job_id": job_id, "state": "SUCCESS", "progress": {"completed": 3, "total": 3}}
+    assert jobs.get_job_status(job_id, owner_id=2) is None
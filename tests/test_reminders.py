@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import reminders
+from app.config import settings
+from app.crud import tasks as crud_tasks
+from app.database import Base, SessionLocal, engine
+from app.models.tasks import Task
+from app.models.users import User
+
+
+class CollectingSink(reminders.NotificationSink):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, batch):
+        self.sent += [reminder["title"] for reminder in batch]
+
+
+@pytest.fixture
+def db(monkeypatch, redis_client):
+    # Scratch SQLite schema; real databases are migrated with Alembic
+    monkeypatch.setattr(reminders, "get_redis", lambda: redis_client)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def add_task(db):
+    owner = User(username="owner", hashed_password="x")
+    db.add(owner)
+    db.commit()
+
+    def add(title, due_in, completed=False):
+        db.add(Task(owner_id=owner.id, title=title, completed=completed, due_at=datetime.utcnow() + due_in))
+        db.commit()
+    return add
+
+
+def test_sink_must_implement_send():
+    with pytest.raises(TypeError):
+        reminders.NotificationSink()
+
+
+def test_first_scan_covers_lead_time_and_backfill(add_task):
+    add_task("soon", timedelta(minutes=5))
+    add_task("overdue", -timedelta(hours=2))
+    add_task("too old", -timedelta(seconds=settings.reminder_backfill_seconds + 60))
+    add_task("later", timedelta(seconds=settings.reminder_lead_seconds + 60))
+    add_task("done", timedelta(minutes=5), completed=True)
+    sink = CollectingSink()
+
+    assert reminders.scan_due_tasks(sink) == 2
+    assert sorted(sink.sent) == ["overdue", "soon"]
+
+
+def test_rescan_never_notifies_twice(add_task):
+    add_task("soon", timedelta(minutes=5))
+    add_task("overdue", -timedelta(hours=2))
+    reminders.scan_due_tasks(CollectingSink())
+
+    sink = CollectingSink()
+    assert reminders.scan_due_tasks(sink) == 0
+    assert sink.sent == []
+
+
+def test_watermark_picks_up_new_and_backfilled_tasks(add_task, redis_client):
+    reminders.scan_due_tasks(CollectingSink())
+    watermark = datetime.fromisoformat(redis_client.get(reminders.WATERMARK_KEY))
+    assert watermark > datetime.utcnow()
+
+    # Created after the last run: one inside the lead time, one already overdue
+    add_task("new", timedelta(minutes=1))
+    add_task("created overdue", -timedelta(hours=3))
+    sink = CollectingSink()
+
+    assert reminders.scan_due_tasks(sink) == 2
+    assert sorted(sink.sent) == ["created overdue", "new"]
+    assert datetime.fromisoformat(redis_client.get(reminders.WATERMARK_KEY)) >= watermark
+
+
+def test_claim_skips_claimed_rows(db, add_task):
+    add_task("soon", timedelta(minutes=5))
+    since, until = datetime.utcnow() - timedelta(hours=1), datetime.utcnow() + timedelta(hours=1)
+
+    first = crud_tasks.claim_due_tasks(db, since=since, until=until, limit=10, claimed_at=datetime.utcnow())
+    db.commit()
+    second = crud_tasks.claim_due_tasks(db, since=since, until=until, limit=10, claimed_at=datetime.utcnow())
+
+    assert [row["title"] for row in first] == ["soon"]
+    assert second == []